@@ -8,6 +8,9 @@ from groq import Groq
 
 DEBUG = False
 
+# Extensions written by preprocess/image_extractor.py
+IMAGE_EXTENSIONS = (".png", ".webp")
+
 def process_floor_json(client, json_file_path, subfolder_path, model_name, img_index):
     """
     Processes a single JSON file: updates objects with an empty description slot using the model-generated description.
@@ -39,12 +42,17 @@ def process_floor_json(client, json_file_path, subfolder_path, model_name, img_i
         if not object_id:
             continue
         
-        # Construct the image file name (e.g., "bench_1_0.png" if img_index==0)
-        image_file_name = f"{object_id}_{img_index}.png"
-        image_path = os.path.join(subfolder_path, "images", image_file_name)
+        # Construct the image file name (e.g., "bench_1_0.png" if img_index==0),
+        # images are extracted as PNG or lossless WebP
+        image_path = None
+        for extension in IMAGE_EXTENSIONS:
+            candidate = os.path.join(subfolder_path, "images", f"{object_id}_{img_index}{extension}")
+            if os.path.exists(candidate):
+                image_path = candidate
+                break
         
-        if not os.path.exists(image_path):
-            print(f"Image file not found: {image_path}")
+        if image_path is None:
+            print(f"Image file not found: {os.path.join(subfolder_path, 'images', f'{object_id}_{img_index}')}.*")
             continue
         
         # Generate a short description using the model
@@ -11,6 +11,9 @@ from transformers import pipeline  # Import the Hugging Face pipelinea
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# Extensions written by preprocess/image_extractor.py
+IMAGE_EXTENSIONS = (".png", ".webp")
+
 
 # ================================
 #        MODEL
@@ -68,10 +71,10 @@ class DataLoader:
                             logging.warning("Object without object_id in %s", json_file_path)
                             continue
 
-                        # Dynamically find all PNG images matching the pattern: object_id_*.png.
+                        # Dynamically find all images matching the pattern: object_id_*.png (or .webp).
                         image_paths = []
                         for filename in os.listdir(images_path):
-                            if filename.startswith(f"{object_id}_") and filename.endswith(".png"):
+                            if filename.startswith(f"{object_id}_") and filename.endswith(IMAGE_EXTENSIONS):
                                 full_path = os.path.join(images_path, filename)
                                 image_paths.append(full_path)
                         image_paths = sorted(image_paths)
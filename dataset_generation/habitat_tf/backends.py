@@ -0,0 +1,576 @@
+from __future__ import annotations
+
+import os
+import gzip
+import json
+import time
+import random
+import tempfile
+import uuid
+import numpy as np
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple, runtime_checkable
+
+try:
+    import habitat_sim
+except ImportError:  # pathfinding can still run on the synthetic backend
+    habitat_sim = None
+
+
+@runtime_checkable
+class PathfinderBackend(Protocol):
+    """
+    Minimal navigation interface used by the episode generation code.
+    Points are numpy arrays [x, y, z] with y the height.
+    """
+
+    def get_random_navigable_point(self, max_tries: int = 10, island_index: int = -1) -> np.ndarray:
+        """Random navigable point, restricted to an island when `island_index` >= 0."""
+        ...
+
+    def get_island(self, point: Sequence[float]) -> int:
+        """Index of the navmesh island (connected component) of a point, -1 if off the navmesh."""
+        ...
+
+    def get_random_navigable_point_near(self, point: Sequence[float], radius: float, max_tries: int = 100) -> np.ndarray:
+        """Random navigable point within `radius`, NaNs if none was found."""
+        ...
+
+    def geodesic_distance(self, start: Sequence[float], goals: np.ndarray) -> float:
+        """Geodesic distance from `start` to the closest goal, inf if unreachable."""
+        ...
+
+    def find_path(self, start: Sequence[float], goals: np.ndarray) -> Tuple[float, np.ndarray]:
+        """(geodesic distance, path waypoints (K, 3)) to the closest goal, (inf, empty) if unreachable."""
+        ...
+
+    def try_step(self, start: Sequence[float], end: Sequence[float]) -> np.ndarray:
+        """Furthest point reached walking in a straight line from `start` to `end`."""
+        ...
+
+    def cast_ray(self, origin: Sequence[float], target: Sequence[float]) -> float:
+        """Distance in meters to the first hit from `origin` towards `target`, inf if none."""
+        ...
+
+    def sample_points_near(self, point: Sequence[float], radius: float, n: int) -> np.ndarray:
+        """`n` random navigable points within `radius`, shape (n, 3), NaN rows for failures."""
+        ...
+
+    def cast_rays(self, origins: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """cast_ray for a block of rays, shape (n,)."""
+        ...
+
+    def try_steps(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """try_step for a block of segments, shape (n, 3)."""
+        ...
+
+    def navmesh_triangles(self) -> np.ndarray:
+        """Triangles of the navmesh, shape (T, 3, 3)."""
+        ...
+
+
+class HabitatBackend:
+    """PathfinderBackend on top of a habitat_sim.Simulator."""
+
+    def __init__(self, sim: "habitat_sim.Simulator"):
+        self.sim = sim
+        self.pathfinder = sim.pathfinder
+        self.scene_id = sim.config.sim_cfg.scene_id
+
+    def get_random_navigable_point(self, max_tries: int = 10, island_index: int = -1) -> np.ndarray:
+        return np.array(
+            self.pathfinder.get_random_navigable_point(max_tries=max_tries, island_index=island_index),
+            dtype=float,
+        )
+
+    def get_island(self, point) -> int:
+        snapped = np.array(self.pathfinder.snap_point(point), dtype=float)
+        if not np.isfinite(snapped).all():
+            return -1
+        return int(self.pathfinder.get_island(snapped))
+
+    def get_random_navigable_point_near(self, point, radius, max_tries=100) -> np.ndarray:
+        return np.array(
+            self.pathfinder.get_random_navigable_point_near(point, radius=radius, max_tries=max_tries),
+            dtype=float,
+        )
+
+    def geodesic_distance(self, start, goals) -> float:
+        return self.find_path(start, goals)[0]
+
+    def find_path(self, start, goals) -> Tuple[float, np.ndarray]:
+        goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+        if len(goals) == 1:
+            path = habitat_sim.ShortestPath()
+            path.requested_end = goals[0].tolist()
+        else:
+            path = habitat_sim.MultiGoalShortestPath()
+            path.requested_ends = goals.tolist()
+        path.requested_start = np.asarray(start, dtype=float).tolist()
+        if not self.pathfinder.find_path(path):
+            return float("inf"), np.zeros((0, 3))
+        return path.geodesic_distance, np.array(path.points, dtype=float).reshape(-1, 3)
+
+    def try_step(self, start, end) -> np.ndarray:
+        return np.array(self.pathfinder.try_step_no_sliding(start, end), dtype=float)
+
+    def cast_ray(self, origin, target) -> float:
+        origin = np.asarray(origin, dtype=float)
+        direction = np.asarray(target, dtype=float) - origin
+        results = self.sim.cast_ray(habitat_sim.geo.Ray(origin, direction))
+        if not results.hits:
+            return float("inf")
+        # ray_distance is expressed in units of the ray direction length
+        return float(results.hits[0].ray_distance * np.linalg.norm(direction))
+
+    # habitat_sim has no batched pathfinder or raycast API, blocks are looped
+    def sample_points_near(self, point, radius, n) -> np.ndarray:
+        return np.array(
+            [self.get_random_navigable_point_near(point, radius, max_tries=20) for _ in range(n)], dtype=float
+        ).reshape(-1, 3)
+
+    def cast_rays(self, origins, targets) -> np.ndarray:
+        return np.array([self.cast_ray(o, t) for o, t in zip(origins, targets)], dtype=float)
+
+    def try_steps(self, starts, ends) -> np.ndarray:
+        return np.array([self.try_step(s, e) for s, e in zip(starts, ends)], dtype=float).reshape(-1, 3)
+
+    def navmesh_triangles(self) -> np.ndarray:
+        # Every 3 consecutive vertices form a triangle
+        return np.array(self.pathfinder.build_navmesh_vertices(), dtype=float).reshape(-1, 3, 3)
+
+
+class NavmeshBackend(HabitatBackend):
+    """
+    HabitatBackend on a bare habitat_sim PathFinder loaded from the scene's
+    `.navmesh` file: no scene mesh, renderer or agent, so no raycasts.
+    """
+
+    def __init__(self, navmesh_path: str, scene_id: Optional[str] = None):
+        self.sim = None
+        self.pathfinder = habitat_sim.nav.PathFinder()
+        if not self.pathfinder.load_nav_mesh(navmesh_path):
+            raise FileNotFoundError(f"Could not load navmesh '{navmesh_path}'")
+        self.scene_id = scene_id or navmesh_path
+
+    def cast_ray(self, origin, target) -> float:
+        raise NotImplementedError("NavmeshBackend has no collision mesh, initialize the simulator with raycasts")
+
+    def close(self) -> None:
+        pass
+
+
+class GridNavmeshBackend:
+    """
+    Synthetic navmesh stand-in in pure NumPy: one boolean occupancy grid per
+    floor (rows along z, columns along x). Floors are not connected to each
+    other, geodesics are 8-connected grid distances and non-navigable cells
+    act as full-height walls for raycasts.
+    """
+
+    def __init__(
+        self,
+        occupancy: np.ndarray,
+        floor_heights: Sequence[float],
+        cell_size: float = 0.1,
+        origin: Sequence[float] = (0.0, 0.0),
+        floor_tolerance: float = 0.5,
+        seed: Optional[int] = None,
+        max_cached_fields: int = 256,
+        scene_id: Optional[str] = None,
+    ):
+        self.occupancy = np.asarray(occupancy, dtype=bool).reshape(len(floor_heights), *np.shape(occupancy)[-2:])
+        self.floor_heights = np.asarray(floor_heights, dtype=float)
+        self.cell_size = float(cell_size)
+        self.origin = np.asarray(origin, dtype=float)
+        self.floor_tolerance = floor_tolerance
+        self.rng = np.random.default_rng(seed)
+        self.scene_id = scene_id or f"grid-{uuid.uuid4().hex}"
+        self.navigable_cells = np.argwhere(self.occupancy)
+        self.islands = self._label_islands()
+        self.counts = Counter()
+        self._fields: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._max_cached_fields = max_cached_fields
+
+    @classmethod
+    def synthetic(
+        cls,
+        size: Sequence[float] = (12.0, 12.0),
+        num_floors: int = 1,
+        floor_height: float = 3.0,
+        cell_size: float = 0.1,
+        num_obstacles: int = 12,
+        seed: int = 0,
+    ) -> "GridNavmeshBackend":
+        """A house-like grid: rooms split by walls with doors, plus box obstacles."""
+        rng = np.random.default_rng(seed)
+        rows, cols = int(size[1] / cell_size), int(size[0] / cell_size)
+        occupancy = np.ones((num_floors, rows, cols), dtype=bool)
+        occupancy[:, [0, -1], :] = False
+        occupancy[:, :, [0, -1]] = False
+        for f in range(num_floors):
+            # One horizontal and one vertical wall, each with two doors
+            r, c = rows // 2, cols // 2
+            occupancy[f, r, :] = False
+            occupancy[f, :, c] = False
+            for door in rng.choice(np.arange(2, cols - 12), size=2, replace=False):
+                occupancy[f, r, door:door + 10] = True
+            for door in rng.choice(np.arange(2, rows - 12), size=2, replace=False):
+                occupancy[f, door:door + 10, c] = True
+            # Furniture
+            for _ in range(num_obstacles):
+                h, w = rng.integers(4, 12, size=2)
+                r0, c0 = rng.integers(1, rows - h - 1), rng.integers(1, cols - w - 1)
+                occupancy[f, r0:r0 + h, c0:c0 + w] = False
+        return cls(occupancy, [f * floor_height for f in range(num_floors)], cell_size=cell_size, seed=seed)
+
+    # --- coordinates ---
+    def _floor_of(self, y: float) -> int:
+        f = int(np.argmin(np.abs(self.floor_heights - y)))
+        return f if abs(self.floor_heights[f] - y) <= self.floor_tolerance else -1
+
+    def _to_cells(self, points: np.ndarray):
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        gaps = np.abs(points[:, 1, None] - np.asarray(self.floor_heights, dtype=float)[None, :])
+        floors = np.argmin(gaps, axis=1) if len(points) else np.zeros(0, dtype=int)
+        floors = np.where(gaps[np.arange(len(points)), floors] <= self.floor_tolerance, floors, -1)
+        rows = np.floor((points[:, 2] - self.origin[1]) / self.cell_size).astype(int)
+        cols = np.floor((points[:, 0] - self.origin[0]) / self.cell_size).astype(int)
+        _, n_rows, n_cols = self.occupancy.shape
+        valid = (floors >= 0) & (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+        return floors, rows, cols, valid
+
+    def _to_world(self, floor: int, row: int, col: int, jitter: bool = False) -> np.ndarray:
+        offset = self.rng.uniform(0.0, 1.0, size=2) if jitter else np.array([0.5, 0.5])
+        return np.array([
+            self.origin[0] + (col + offset[0]) * self.cell_size,
+            self.floor_heights[floor],
+            self.origin[1] + (row + offset[1]) * self.cell_size,
+        ])
+
+    def is_navigable(self, point) -> bool:
+        return bool(self._navigable(point)[0])
+
+    # --- PathfinderBackend ---
+    def get_random_navigable_point(self, max_tries: int = 10, island_index: int = -1) -> np.ndarray:
+        self.counts["random_point"] += 1
+        cells = self.navigable_cells
+        if island_index >= 0:
+            cells = cells[self.islands[tuple(cells.T)] == island_index]
+            if len(cells) == 0:
+                return np.full(3, np.nan)
+        f, r, c = cells[self.rng.integers(len(cells))]
+        return self._to_world(f, r, c, jitter=True)
+
+    def get_island(self, point) -> int:
+        self.counts["island"] += 1
+        floors, rows, cols, valid = self._to_cells(point)
+        if not valid[0]:
+            return -1
+        return int(self.islands[floors[0], rows[0], cols[0]])
+
+    def get_random_navigable_point_near(self, point, radius, max_tries=100) -> np.ndarray:
+        self.counts["random_point_near"] += 1
+        floor, cells = self._cells_near(point, radius)
+        if len(cells) == 0:
+            return np.full(3, np.nan)
+        r, c = cells[self.rng.integers(len(cells))]
+        return self._to_world(floor, r, c, jitter=True)
+
+    def sample_points_near(self, point, radius, n) -> np.ndarray:
+        self.counts["random_point_near"] += n
+        floor, cells = self._cells_near(point, radius)
+        if len(cells) == 0:
+            return np.full((n, 3), np.nan)
+        picked = cells[self.rng.integers(len(cells), size=n)]
+        offsets = self.rng.uniform(0.0, 1.0, size=(n, 2))
+        return np.stack([
+            self.origin[0] + (picked[:, 1] + offsets[:, 0]) * self.cell_size,
+            np.full(n, self.floor_heights[floor]),
+            self.origin[1] + (picked[:, 0] + offsets[:, 1]) * self.cell_size,
+        ], axis=1)
+
+    def geodesic_distance(self, start, goals) -> float:
+        self.counts["geodesic"] += 1
+        floors, rows, cols, valid = self._to_cells(start)
+        if not valid[0] or not self.occupancy[floors[0], rows[0], cols[0]]:
+            return float("inf")
+        field = self._goal_field(floors[0], goals)
+        return float(field[rows[0], cols[0]])
+
+    def find_path(self, start, goals) -> Tuple[float, np.ndarray]:
+        self.counts["find_path"] += 1
+        floors, rows, cols, valid = self._to_cells(start)
+        if not valid[0] or not self.occupancy[floors[0], rows[0], cols[0]]:
+            return float("inf"), np.zeros((0, 3))
+        field = self._goal_field(floors[0], goals)
+        r, c = rows[0], cols[0]
+        if not np.isfinite(field[r, c]):
+            return float("inf"), np.zeros((0, 3))
+
+        # Descend the goal field to a goal cell
+        points = [np.asarray(start, dtype=float)]
+        for _ in range(field.size):
+            r0, r1 = max(r - 1, 0), min(r + 2, field.shape[0])
+            c0, c1 = max(c - 1, 0), min(c + 2, field.shape[1])
+            window = field[r0:r1, c0:c1]
+            dr, dc = np.unravel_index(np.argmin(window), window.shape)
+            if window[dr, dc] >= field[r, c]:
+                break
+            r, c = r0 + dr, c0 + dc
+            points.append(self._to_world(floors[0], r, c))
+        return float(field[rows[0], cols[0]]), np.array(points)
+
+    def try_step(self, start, end) -> np.ndarray:
+        self.counts["try_step"] += 1
+        start, end = np.asarray(start, dtype=float), np.asarray(end, dtype=float)
+        samples = self._segment(start, end)
+        blocked = np.flatnonzero(~self._navigable(samples))
+        if len(blocked) == 0:
+            return end
+        return samples[blocked[0] - 1] if blocked[0] > 0 else start
+
+    def cast_ray(self, origin, target) -> float:
+        self.counts["raycast"] += 1
+        origin, target = np.asarray(origin, dtype=float), np.asarray(target, dtype=float)
+        # Walls are full height, march on the origin floor
+        flat_target = np.array([target[0], origin[1], target[2]])
+        samples = self._segment(origin, flat_target)
+        blocked = np.flatnonzero(~self._navigable(samples))
+        if len(blocked) == 0:
+            return float("inf")
+        return float(np.linalg.norm(samples[blocked[0]] - origin))
+
+    def cast_rays(self, origins, targets) -> np.ndarray:
+        self.counts["raycast"] += len(origins)
+        origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+        targets = np.asarray(targets, dtype=float).reshape(-1, 3).copy()
+        if len(origins) == 0:
+            return np.zeros(0)
+        targets[:, 1] = origins[:, 1]
+        # March all rays together with the same number of samples
+        lengths = np.linalg.norm(targets - origins, axis=1)
+        n = max(int(np.ceil(lengths.max() / (self.cell_size / 2))), 1)
+        t = np.linspace(0.0, 1.0, n + 1)
+        samples = origins[:, None, :] + t[None, :, None] * (targets - origins)[:, None, :]
+        blocked = ~self._navigable(samples.reshape(-1, 3)).reshape(len(origins), n + 1)
+        first = np.argmax(blocked, axis=1)
+        hits = np.where(blocked.any(axis=1), t[first] * lengths, np.inf)
+        return hits
+
+    def try_steps(self, starts, ends) -> np.ndarray:
+        self.counts["try_step"] += len(starts)
+        starts = np.asarray(starts, dtype=float).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+        if len(starts) == 0:
+            return np.zeros((0, 3))
+        # March all segments together with the same number of samples
+        n = max(int(np.ceil(np.linalg.norm(ends - starts, axis=1).max() / (self.cell_size / 2))), 1)
+        t = np.linspace(0.0, 1.0, n + 1)
+        samples = starts[:, None, :] + t[None, :, None] * (ends - starts)[:, None, :]
+        blocked = ~self._navigable(samples.reshape(-1, 3)).reshape(len(starts), n + 1)
+        first = np.argmax(blocked, axis=1)
+        # Last free sample before the first blocked one, the start if that is blocked
+        reached = samples[np.arange(len(starts)), np.maximum(first - 1, 0)]
+        return np.where(blocked.any(axis=1)[:, None], reached, ends)
+
+    def navmesh_triangles(self) -> np.ndarray:
+        # Two triangles per navigable cell
+        floors, rows, cols = self.navigable_cells.T
+        x0 = self.origin[0] + cols * self.cell_size
+        z0 = self.origin[1] + rows * self.cell_size
+        x1, z1 = x0 + self.cell_size, z0 + self.cell_size
+        y = self.floor_heights[floors]
+        corners = [np.stack([x, y, z], axis=1) for x, z in ((x0, z0), (x1, z0), (x1, z1), (x0, z1))]
+        first = np.stack([corners[0], corners[1], corners[2]], axis=1)
+        second = np.stack([corners[0], corners[2], corners[3]], axis=1)
+        return np.concatenate([first, second])
+
+    # --- helpers ---
+    def _label_islands(self) -> np.ndarray:
+        """8-connected components of each floor (like the geodesics), -1 for blocked cells."""
+        from scipy.ndimage import label
+
+        islands = np.full(self.occupancy.shape, -1, dtype=np.int32)
+        offset = 0
+        for f, grid in enumerate(self.occupancy):
+            labels, n = label(grid, structure=np.ones((3, 3), dtype=int))
+            islands[f][grid] = labels[grid] - 1 + offset
+            offset += n
+        return islands
+
+    def _cells_near(self, point, radius: float):
+        """(floor, navigable cells within `radius` of `point` on its floor)."""
+        floors, rows, cols, valid = self._to_cells(point)
+        if floors[0] < 0:
+            return -1, np.zeros((0, 2), dtype=int)
+        reach = int(np.ceil(radius / self.cell_size))
+        grid = self.occupancy[floors[0]]
+        r0, r1 = max(rows[0] - reach, 0), min(rows[0] + reach + 1, grid.shape[0])
+        c0, c1 = max(cols[0] - reach, 0), min(cols[0] + reach + 1, grid.shape[1])
+        cells = np.argwhere(grid[r0:r1, c0:c1]) + [r0, c0]
+        dist = np.hypot(cells[:, 0] - rows[0], cells[:, 1] - cols[0]) * self.cell_size
+        return floors[0], cells[dist <= radius]
+
+    def _navigable(self, points: np.ndarray) -> np.ndarray:
+        floors, rows, cols, valid = self._to_cells(points)
+        ok = valid.copy()
+        ok[valid] = self.occupancy[floors[valid], rows[valid], cols[valid]]
+        return ok
+
+    def _segment(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        n = max(int(np.ceil(np.linalg.norm(end - start) / (self.cell_size / 2))), 1)
+        return start + np.linspace(0.0, 1.0, n + 1)[:, None] * (end - start)
+
+    def _goal_field(self, floor: int, goals) -> np.ndarray:
+        """Grid distance from every cell of `floor` to the closest goal cell, cached per goal set."""
+        floors, rows, cols, valid = self._to_cells(goals)
+        keep = valid & (floors == floor)
+        keep[keep] &= self.occupancy[floor, rows[keep], cols[keep]]
+        key = np.array([floor, *np.ravel(np.c_[rows[keep], cols[keep]])], dtype=np.int64).tobytes()
+        if key in self._fields:
+            self._fields.move_to_end(key)
+            return self._fields[key]
+
+        nav = self.occupancy[floor]
+        dist = np.full(nav.shape, np.inf)
+        dist[rows[keep], cols[keep]] = 0.0
+        steps = [(-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+                 (-1, -1, np.sqrt(2)), (-1, 1, np.sqrt(2)), (1, -1, np.sqrt(2)), (1, 1, np.sqrt(2))]
+        # Vectorized relaxation until no distance improves
+        while True:
+            previous = dist
+            for dr, dc, w in steps:
+                shifted = np.full(nav.shape, np.inf)
+                dst_r = slice(max(dr, 0), nav.shape[0] + min(dr, 0))
+                src_r = slice(max(-dr, 0), nav.shape[0] + min(-dr, 0))
+                dst_c = slice(max(dc, 0), nav.shape[1] + min(dc, 0))
+                src_c = slice(max(-dc, 0), nav.shape[1] + min(-dc, 0))
+                shifted[dst_r, dst_c] = dist[src_r, src_c] + w
+                # Mask after every step so distances never leak through walls
+                dist = np.where(nav, np.minimum(dist, shifted), np.inf)
+            if np.array_equal(dist, previous):
+                break
+        field = dist * self.cell_size
+
+        self._fields[key] = field
+        if len(self._fields) > self._max_cached_fields:
+            self._fields.popitem(last=False)
+        return field
+
+
+def as_backend(sim) -> PathfinderBackend:
+    """Wraps a habitat_sim.Simulator in a HabitatBackend, backends are returned as-is."""
+    if isinstance(sim, PathfinderBackend):
+        return sim
+    return HabitatBackend(sim)
+
+
+def write_synthetic_goat_scene(
+    backend: GridNavmeshBackend,
+    base_path: str,
+    scene_id: str,
+    num_objects: int = 50,
+    num_view_points: int = 8,
+    split: str = "val_seen",
+) -> List[Dict[str, Any]]:
+    """
+    Writes a GOAT-like `<split>/content/<scene>.json.gz` for a synthetic backend
+    and returns matching input episodes (scene_id, object_id, object_pos).
+    """
+    scene_name = os.path.basename(scene_id).split(".")[0]
+    goals, goat_episodes, episodes = [], [], []
+    for obj_id in range(num_objects):
+        object_pos = backend.get_random_navigable_point()
+        view_points = [backend.get_random_navigable_point_near(object_pos, radius=1.0) for _ in range(num_view_points)]
+        goals.append({
+            "object_id": obj_id,
+            "view_points": [
+                {"agent_state": {"position": vp.tolist(), "rotation": [0.0, 0.0, 0.0, 1.0]}}
+                for vp in view_points if np.isfinite(vp).all()
+            ],
+        })
+        goat_episodes.append({
+            "start_position": backend.get_random_navigable_point().tolist(),
+            "start_rotation": [0.0, 0.0, 0.0, 1.0],
+            "tasks": [["object", "object", obj_id]],
+        })
+        episodes.append({"scene_id": scene_id, "object_id": obj_id, "object_pos": object_pos.tolist()})
+
+    content_dir = os.path.join(base_path, split, "content")
+    os.makedirs(content_dir, exist_ok=True)
+    with gzip.open(os.path.join(content_dir, f"{scene_name}.json.gz"), "wt", encoding="utf-8") as f:
+        json.dump({"goals": {f"{scene_name}.basis.glb_object": goals}, "episodes": goat_episodes}, f)
+    return episodes
+
+
+def benchmark_backend_sampling(num_objects: int = 50, level: str = "easy", seed: int = 0) -> None:
+    """
+    Runs prepare_episode_data end to end on a synthetic GridNavmeshBackend, so
+    the start sampling strategies can be profiled without habitat_sim or scene
+    assets. Reports wall time and backend query counts per strategy.
+    """
+    from habitat_tf import distance_field, point_pool, utils
+    from habitat_tf.nav_episode import prepare_episode_data, sampling_report, SAMPLING_STATS
+
+    strategies = {
+        "per-goal loop": {},
+        "multi-goal": {"use_multigoal": True},
+        "islands": {"use_multigoal": True, "use_islands": True},
+        "point pool": {"use_multigoal": True, "use_point_pool": True},
+        "annulus": {"use_annulus": True},
+        "annulus + pool": {"use_annulus": True, "use_point_pool": True},
+        "GOAT starts": {"use_annulus": True, "validate_starts": True},
+        "distance field": {"use_multigoal": True, "use_point_pool": True, "use_distance_field": True},
+    }
+    with tempfile.TemporaryDirectory() as base_path:
+        for name, kwargs in strategies.items():
+            random.seed(seed)
+            np.random.seed(seed)
+            backend = GridNavmeshBackend.synthetic(seed=seed)
+            episodes = write_synthetic_goat_scene(backend, base_path, "synthetic/synthetic.basis.glb", num_objects)
+            point_pool._POINT_POOLS.clear()
+            distance_field._POINT_GRAPHS.clear()
+            distance_field._DISTANCE_FIELDS.clear()
+            utils._SCENE_DATA.clear()
+            backend.counts.clear()
+            SAMPLING_STATS.clear()
+
+            start = time.perf_counter()
+            episodes = prepare_episode_data(backend, episodes, base_path=base_path, level=level, use_view_points=True, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            geo = np.mean([ep["geodesic_distance"] for ep in episodes])
+            print(f"{name:>15}: {elapsed:6.2f}s for {len(episodes)} episodes | "
+                  f"mean geodesic {geo:5.2f} | queries {dict(backend.counts)}")
+            for line in sampling_report():
+                print(f"{'':>17}{line}")
+
+
+def benchmark_viewpoint_sampling(num_objects: int = 200, count: int = 15, repeats: int = 2, seed: int = 0) -> None:
+    """
+    Compares the sequential and batched view point samplers on a synthetic
+    GridNavmeshBackend. Each object is sampled `repeats` times to show the
+    effect of the per-object visibility cache.
+    """
+    from habitat_tf.utils import sample_additional_viewpoints, sample_additional_viewpoints_batched
+
+    samplers = {"sequential": sample_additional_viewpoints, "batched": sample_additional_viewpoints_batched}
+    for name, sampler in samplers.items():
+        np.random.seed(seed)
+        backend = GridNavmeshBackend.synthetic(seed=seed)
+        objects = [backend.get_random_navigable_point() for _ in range(num_objects)]
+        backend.counts.clear()
+
+        start = time.perf_counter()
+        n_views = 0
+        for _ in range(repeats):
+            for object_pos in objects:
+                n_views += len(sampler(backend, object_pos, count=count, max_tries=200))
+        elapsed = time.perf_counter() - start
+        print(f"{name:>15}: {elapsed:6.2f}s for {n_views} view points | queries {dict(backend.counts)}")
+
+
+if __name__ == "__main__":
+    benchmark_backend_sampling()
+    benchmark_viewpoint_sampling()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+try:
+    import habitat_sim
+except ImportError:  # graphs can be built from any PathfinderBackend
+    habitat_sim = None
+
+from habitat_tf.backends import as_backend
+from habitat_tf.point_pool import NavigablePointPool
+
+# Point graphs per scene and distance fields per (scene, goal), shared across episodes
+_POINT_GRAPHS: Dict[str, "PointGraph"] = {}
+_DISTANCE_FIELDS: "OrderedDict[Tuple[str, bytes, float], np.ndarray]" = OrderedDict()
+MAX_CACHED_FIELDS = 1024
+
+
+def are_straight_steps(
+    sim: habitat_sim.Simulator,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    tolerance: float = 0.05,
+) -> np.ndarray:
+    """
+    True for each segment the agent can walk in a straight line on the
+    navmesh, with one batched try_steps call.
+    """
+    reached = as_backend(sim).try_steps(starts, ends)
+    return np.linalg.norm(reached - ends, axis=1) <= tolerance
+
+
+class PointGraph:
+    """
+    Sparse graph over the points of a NavigablePointPool: each point is
+    connected to its `k` nearest neighbours within `max_edge` meters when the
+    straight segment between them is walkable. Shortest paths on this graph
+    are walkable paths, so graph distances upper-bound the true geodesic.
+    """
+
+    def __init__(
+        self,
+        sim: habitat_sim.Simulator,
+        pool: NavigablePointPool,
+        k: int = 8,
+        max_edge: float = 1.0,
+        max_step_height: float = 0.3,
+    ):
+        self.points = pool.points.astype(float)
+        self.tree = cKDTree(self.points)
+        self.max_edge = max_edge
+        self.max_step_height = max_step_height
+
+        n = len(self.points)
+        dists, idx = self.tree.query(self.points, k=min(k + 1, n), distance_upper_bound=max_edge)
+        rows = np.repeat(np.arange(n), dists.shape[1] - 1)
+        cols, weights = idx[:, 1:].ravel(), dists[:, 1:].ravel()
+
+        # Missing neighbours are reported with an infinite distance, each pair is kept once
+        keep = np.isfinite(weights)
+        keep[keep] &= cols[keep] > rows[keep]
+        keep[keep] &= np.abs(self.points[rows[keep], 1] - self.points[cols[keep], 1]) <= max_step_height
+        rows, cols, weights = rows[keep], cols[keep], weights[keep]
+
+        # All candidate edges are checked with one batched try_steps call
+        walkable = are_straight_steps(sim, self.points[rows], self.points[cols])
+        rows, cols, weights = rows[walkable], cols[walkable], weights[walkable]
+
+        # One extra empty node, used as the virtual source of distance_field
+        self.num_points = n
+        self.graph = coo_matrix((weights, (rows, cols)), shape=(n + 1, n + 1)).tocsr()
+
+    def attach(
+        self,
+        sim: habitat_sim.Simulator,
+        goals: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Connects each goal to the pool points it can reach in a straight line.
+
+        :return: (point indices, offsets) where offset is the distance from the
+            closest attached goal to that point.
+        """
+        pairs = [(g, j) for g, near in enumerate(self.tree.query_ball_point(goals, r=self.max_edge)) for j in near]
+        if not pairs:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        g, j = np.array(pairs).T
+        keep = np.abs(self.points[j, 1] - goals[g, 1]) <= self.max_step_height
+        g, j = g[keep], j[keep]
+
+        # Each point is offset from its closest goal it can walk to: candidate
+        # goals are tried closest first, one batched round per rank.
+        d = np.linalg.norm(self.points[j] - goals[g], axis=1)
+        order = np.lexsort((d, j))
+        g, j, d = g[order], j[order], d[order]
+        first = np.r_[0, np.flatnonzero(np.diff(j)) + 1]
+        rank = np.arange(len(j)) - np.repeat(first, np.diff(np.r_[first, len(j)]))
+
+        offsets: Dict[int, float] = {}
+        for r in range(int(rank.max()) + 1 if len(rank) else 0):
+            todo = np.flatnonzero(rank == r)
+            todo = todo[[int(p) not in offsets for p in j[todo]]]
+            if len(todo) == 0:
+                break
+            walkable = todo[are_straight_steps(sim, goals[g[todo]], self.points[j[todo]])]
+            offsets.update(zip(j[walkable].tolist(), d[walkable].tolist()))
+        idx = np.fromiter(offsets.keys(), dtype=int, count=len(offsets))
+        return idx, np.fromiter(offsets.values(), dtype=float, count=len(offsets))
+
+    def distance_field(
+        self,
+        sim: habitat_sim.Simulator,
+        goals: np.ndarray,
+        limit: float = np.inf,
+    ) -> np.ndarray:
+        """
+        Graph geodesic distance from every pool point to the closest goal, with
+        a single multi-source Dijkstra from a virtual node linked to all goals.
+
+        :return: float32 array of shape (N,), inf for unreachable points.
+        """
+        n = self.num_points
+        idx, offsets = self.attach(sim, np.asarray(goals, dtype=float).reshape(-1, 3))
+        if len(idx) == 0:
+            return np.full(n, np.inf, dtype=np.float32)
+
+        # Virtual source node n, linked to the attached points with their offsets
+        source = csr_matrix((offsets, (np.full(len(idx), n), idx)), shape=(n + 1, n + 1))
+        dist = dijkstra(self.graph + source, directed=False, indices=n, limit=limit)
+        return dist[:n].astype(np.float32)
+
+
+def get_point_graph(
+    sim: habitat_sim.Simulator,
+    scene_key: str,
+    pool: NavigablePointPool,
+) -> PointGraph:
+    """Returns the scene's point graph, building it on first use."""
+    if scene_key not in _POINT_GRAPHS:
+        _POINT_GRAPHS[scene_key] = PointGraph(sim, pool)
+    return _POINT_GRAPHS[scene_key]
+
+
+def get_distance_field(
+    sim: habitat_sim.Simulator,
+    scene_key: str,
+    pool: NavigablePointPool,
+    goals: np.ndarray,
+    limit: float = np.inf,
+) -> np.ndarray:
+    """
+    Returns the distance field of a goal (the set of view_points of an object),
+    cached per (scene, goal) so repeated summaries and multi-instance merges of
+    the same object reuse it.
+    """
+    goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+    key = (scene_key, np.round(goals, 2).tobytes(), float(limit))
+    if key in _DISTANCE_FIELDS:
+        _DISTANCE_FIELDS.move_to_end(key)
+        return _DISTANCE_FIELDS[key]
+
+    field = get_point_graph(sim, scene_key, pool).distance_field(sim, goals, limit=limit)
+    _DISTANCE_FIELDS[key] = field
+    if len(_DISTANCE_FIELDS) > MAX_CACHED_FIELDS:
+        _DISTANCE_FIELDS.popitem(last=False)
+    return field
+
+
+def select_start_from_field(
+    field: np.ndarray,
+    pool: NavigablePointPool,
+    object_pos: np.ndarray,
+    goal_heights: np.ndarray,
+    closest_y: float,
+    max_geodesic: float,
+    max_euclidean: float,
+    min_geodesic: float,
+    max_height_diff: float,
+    max_closest_height_diff: float,
+) -> np.ndarray:
+    """
+    Indices of the pool points that satisfy all the start constraints
+    according to the distance field, in random order.
+    """
+    points = pool.points
+    y = points[:, 1]
+    mask = (field >= min_geodesic) & (field <= max_geodesic)
+    mask &= np.abs(y - closest_y) <= max_closest_height_diff
+    mask &= (np.abs(y[:, None] - np.asarray(goal_heights)[None, :]) <= max_height_diff).any(axis=1)
+    mask &= np.linalg.norm(points[:, [0, 2]] - object_pos[[0, 2]], axis=1) <= max_euclidean
+    return np.random.permutation(np.flatnonzero(mask))
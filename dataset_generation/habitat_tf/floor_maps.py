@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from habitat_tf.backends import as_backend
+
+DEFAULT_FLOOR_MAPS_DIR = "data/floor_maps"
+META_FILE = "meta.json"
+
+# Map metadata already read in this process, per scene folder
+_FLOOR_MAP_META: Dict[str, Dict[str, Any]] = {}
+
+
+def floor_map_key(scene_name: str, floor: int) -> str:
+    """Key stored in episodes to reference a floor map, e.g. "4ok3usBNeis/floor_0"."""
+    return f"{scene_name}/floor_{int(floor)}"
+
+
+def floor_index(floor_id: Any) -> Optional[int]:
+    """
+    Floor id of an annotation as the int index of the floor maps. Annotated
+    scenes store it as a string ("0", "1", ...); None for missing or
+    non-numeric ids.
+    """
+    try:
+        return int(floor_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def scene_floor_heights(sim, scene_name: Optional[str] = None, cache_dir: Optional[str] = None) -> List[float]:
+    """Floor heights of a scene, ascending, in the order used for the floor ids."""
+    from preprocess.utils import load_floor_model
+
+    return load_floor_model(sim, scene_name, cache_dir=cache_dir)
+
+
+def rasterize_triangles(
+    triangles: np.ndarray,
+    origin: Sequence[float],
+    shape: Tuple[int, int],
+    meters_per_pixel: float,
+    chunk_size: int = 4096,
+) -> np.ndarray:
+    """
+    Top-down height map of navmesh triangles: each cell whose center falls in
+    a triangle gets the interpolated height (the highest one where triangles
+    overlap), NaN elsewhere.
+
+    :param triangles: Triangles (T, 3, 3) with y the height.
+    :param origin: World [x, z] of the corner of cell (0, 0).
+    :param shape: (rows along z, columns along x).
+    :return: float32 array of `shape`.
+    """
+    heights = np.full(shape, -np.inf, dtype=np.float32)
+    n_rows, n_cols = shape
+    for start in range(0, len(triangles), chunk_size):
+        tri = np.asarray(triangles[start:start + chunk_size], dtype=float)
+        # Triangle corners in cell units, [col, row]
+        xz = (tri[:, :, [0, 2]] - np.asarray(origin, dtype=float)) / meters_per_pixel
+        lo = np.clip(np.floor(xz.min(axis=1)).astype(int), 0, [n_cols - 1, n_rows - 1])
+        hi = np.clip(np.floor(xz.max(axis=1)).astype(int), 0, [n_cols - 1, n_rows - 1])
+        size = hi - lo + 1
+        n = size.prod(axis=1)
+
+        # Enumerate the cells of every triangle's bounding box
+        t = np.repeat(np.arange(len(tri)), n)
+        k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        cols = lo[t, 0] + k % size[t, 0]
+        rows = lo[t, 1] + k // size[t, 0]
+
+        # Barycentric coordinates of the cell centers
+        a, b, c = xz[t, 0], xz[t, 1], xz[t, 2]
+        v0, v1 = b - a, c - a
+        v2 = np.stack([cols + 0.5, rows + 0.5], axis=1) - a
+        den = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w1 = (v2[:, 0] * v1[:, 1] - v1[:, 0] * v2[:, 1]) / den
+            w2 = (v0[:, 0] * v2[:, 1] - v2[:, 0] * v0[:, 1]) / den
+        w0 = 1.0 - w1 - w2
+        eps = 1e-6
+        inside = (den != 0) & (w0 >= -eps) & (w1 >= -eps) & (w2 >= -eps)
+
+        y = w0 * tri[t, 0, 1] + w1 * tri[t, 1, 1] + w2 * tri[t, 2, 1]
+        np.maximum.at(heights, (rows[inside], cols[inside]), y[inside].astype(np.float32))
+
+    heights[np.isinf(heights)] = np.nan
+    return heights
+
+
+def build_floor_maps(
+    sim,
+    scene_name: str,
+    floor_heights: Sequence[float],
+    maps_dir: str = DEFAULT_FLOOR_MAPS_DIR,
+    meters_per_pixel: float = 0.05,
+    overwrite: bool = False,
+) -> Dict[int, str]:
+    """
+    Rasterizes the navmesh of each floor once into a float16 top-down height
+    map (NaN for non-navigable cells), saved as an uncompressed `.npy` so it
+    can be memory-mapped:
+        <maps_dir>/<scene_name>/floor_<k>.npy
+        <maps_dir>/<scene_name>/meta.json
+    All floors of a scene share the same grid. Triangles are assigned to the
+    floor with the closest height, split halfway between floors.
+
+    :param sim: habitat_sim.Simulator or PathfinderBackend.
+    :param floor_heights: Floor heights, ascending; floor k is floor_heights[k].
+    :param overwrite: Rebuild the maps even if they are already on disk.
+    :return: {floor id: floor map key}
+    """
+    scene_dir = os.path.join(maps_dir, scene_name)
+    meta_path = os.path.join(scene_dir, META_FILE)
+    floor_heights = [float(h) for h in floor_heights]
+    keys = {k: floor_map_key(scene_name, k) for k in range(len(floor_heights))}
+
+    if not overwrite and os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if (
+            meta["meters_per_pixel"] == meters_per_pixel
+            and np.allclose(meta["floor_heights"], floor_heights)
+            and all(os.path.exists(os.path.join(scene_dir, f"floor_{k}.npy")) for k in keys)
+        ):
+            return keys
+
+    triangles = as_backend(sim).navmesh_triangles()
+    os.makedirs(scene_dir, exist_ok=True)
+
+    origin = triangles[:, :, [0, 2]].reshape(-1, 2).min(axis=0)
+    extent = triangles[:, :, [0, 2]].reshape(-1, 2).max(axis=0) - origin
+    shape = (int(np.ceil(extent[1] / meters_per_pixel)) + 1, int(np.ceil(extent[0] / meters_per_pixel)) + 1)
+
+    # Floor of each triangle from its mean height
+    edges = (np.asarray(floor_heights[1:]) + np.asarray(floor_heights[:-1])) / 2
+    triangle_floors = np.searchsorted(edges, triangles[:, :, 1].mean(axis=1))
+
+    for k in keys:
+        heights = rasterize_triangles(triangles[triangle_floors == k], origin, shape, meters_per_pixel)
+        np.save(os.path.join(scene_dir, f"floor_{k}.npy"), heights.astype(np.float16))
+
+    meta = {
+        "scene": scene_name,
+        "origin": origin.tolist(),
+        "meters_per_pixel": meters_per_pixel,
+        "shape": list(shape),
+        "floor_heights": floor_heights,
+    }
+    # meta.json last, it marks the maps as complete
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    _FLOOR_MAP_META.pop(os.path.abspath(scene_dir), None)
+    return keys
+
+
+def load_floor_map(key: str, maps_dir: str = DEFAULT_FLOOR_MAPS_DIR) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Memory-maps a floor map referenced by an episode.
+
+    :param key: Floor map key, see floor_map_key.
+    :return: (read-only float16 height map, NaN for non-navigable cells; scene meta)
+    """
+    scene_name, floor = key.split("/")
+    scene_dir = os.path.abspath(os.path.join(maps_dir, scene_name))
+    if scene_dir not in _FLOOR_MAP_META:
+        with open(os.path.join(scene_dir, META_FILE), "r") as f:
+            _FLOOR_MAP_META[scene_dir] = json.load(f)
+    return np.load(os.path.join(scene_dir, f"{floor}.npy"), mmap_mode="r"), _FLOOR_MAP_META[scene_dir]
+
+
+def world_to_map(points: np.ndarray, meta: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows, cols) of world points [x, y, z] in the floor maps of a scene."""
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    rows = np.floor((points[:, 2] - meta["origin"][1]) / meta["meters_per_pixel"]).astype(int)
+    cols = np.floor((points[:, 0] - meta["origin"][0]) / meta["meters_per_pixel"]).astype(int)
+    return rows, cols
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import hashlib
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class GeodesicCache:
+    """
+    Persistent cache of geodesic distances shared across runs and processes.
+    Entries are stored in SQLite (WAL mode, so several generation processes
+    can read and write the same file) and keyed by
+    (scene, quantized start, quantized goal set).
+    """
+
+    def __init__(self, path: str, quantization: float = 0.01, flush_every: int = 500):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.quantization = quantization
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[Tuple[str, str, str], Optional[float]] = {}
+
+        self.conn = sqlite3.connect(path, timeout=60.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS geodesic ("
+            " scene TEXT NOT NULL, start TEXT NOT NULL, goal TEXT NOT NULL, distance REAL,"
+            " PRIMARY KEY (scene, start, goal))"
+        )
+        self.conn.commit()
+
+    def _quantize(self, points: np.ndarray) -> np.ndarray:
+        return np.round(np.asarray(points, dtype=float) / self.quantization).astype(np.int64)
+
+    def key(self, start: np.ndarray, goals: np.ndarray) -> Tuple[str, str]:
+        start_q = self._quantize(start).reshape(3)
+        goals_q = self._quantize(goals).reshape(-1, 3)
+        # Goal sets are order independent
+        goals_q = np.unique(goals_q, axis=0)
+        start_key = ",".join(map(str, start_q))
+        goal_key = hashlib.sha1(goals_q.tobytes()).hexdigest()
+        return start_key, goal_key
+
+    def get(self, scene: str, start: np.ndarray, goals: np.ndarray) -> Optional[float]:
+        """Cached distance (inf for unreachable goals), or None on a miss."""
+        start_key, goal_key = self.key(start, goals)
+        key = (scene, start_key, goal_key)
+        if key in self._pending:
+            # Not flushed yet
+            row = (self._pending[key],)
+        else:
+            row = self.conn.execute(
+                "SELECT distance FROM geodesic WHERE scene=? AND start=? AND goal=?", key
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return float("inf") if row[0] is None else float(row[0])
+
+    def put(self, scene: str, start: np.ndarray, goals: np.ndarray, distance: float) -> None:
+        start_key, goal_key = self.key(start, goals)
+        value = None if not np.isfinite(distance) else float(distance)
+        self._pending[(scene, start_key, goal_key)] = value
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO geodesic (scene, start, goal, distance) VALUES (?, ?, ?, ?)",
+                [key + (value,) for key, value in self._pending.items()],
+            )
+        self._pending = {}
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def for_scene(self, scene: str) -> "SceneGeodesicCache":
+        return SceneGeodesicCache(self, scene)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SceneGeodesicCache:
+    """View of a GeodesicCache bound to a single scene."""
+
+    def __init__(self, cache: GeodesicCache, scene: str):
+        self.cache = cache
+        self.scene = scene
+
+    def get(self, start: np.ndarray, goals: np.ndarray) -> Optional[float]:
+        return self.cache.get(self.scene, start, goals)
+
+    def put(self, start: np.ndarray, goals: np.ndarray, distance: float) -> None:
+        self.cache.put(self.scene, start, goals, distance)
@@ -1,16 +1,32 @@
+from __future__ import annotations
+
 import os
 import gzip
 import json
+import time
 import random
+import argparse
+from collections import Counter, defaultdict
 from typing import List, Dict, Any, Optional
-import habitat_sim
 import numpy as np
 
+try:
+    import habitat_sim
+except ImportError:  # episodes can still be sampled on a GridNavmeshBackend
+    habitat_sim = None
+
 # Local imports
 from habitat_tf.utils import (
-    make_simple_cfg, random_yaw_rotation, sample_additional_viewpoints, 
-    euclidean_distance, load_merged_scene_data, build_lookups, all_goals, get_rotation_to_point
+    make_simple_cfg, make_nav_cfg, random_yaw_rotation, sample_additional_viewpoints_batched,
+    euclidean_distance, load_scene_lookups, all_goals, get_rotation_to_point,
+    geodesic_distance, goal_array
 )
+from habitat_tf.backends import as_backend, NavmeshBackend
+from habitat_tf.point_pool import NavigablePointPool, get_point_pool, scene_key_from_id
+from habitat_tf.distance_field import get_distance_field, select_start_from_field
+from habitat_tf.geodesic_cache import GeodesicCache, SceneGeodesicCache
+from habitat_tf.viewpoint_store import ViewpointStore
+from habitat_tf.scene_catalog import get_catalog, DEFAULT_SCENES_ROOT
 
 # Setup the Habitat Simulator for the current scene.
 SIM_SETTINGS = {
@@ -22,12 +38,40 @@ SIM_SETTINGS = {
     "hfov": 90,                # Horizontal field of view
 }
 
+# Start sampling telemetry per level, reported at the end of a run
+SAMPLING_STATS: Dict[str, Counter] = defaultdict(Counter)
+# Candidate starts drawn so far, used to count tries per episode
+_DRAWN = Counter()
 
-def initialize_simulator(scene_id):
-    
+
+def initialize_simulator(scene_id, nav_only: bool = False, raycasts: bool = True, needs_raycasts: bool = False):
+    """
+    Loads a scene for episode generation.
+
+    :param scene_id: Scene name, e.g. "4ok3usBNeis".
+    :param nav_only: Skip the renderer and the RGB sensor, episode generation
+        only needs the pathfinder and raycasts.
+    :param raycasts: With `nav_only`, also load the scene mesh for cast_ray. When
+        False only `<name>.basis.navmesh` is loaded and a NavmeshBackend is returned.
+    :param needs_raycasts: The caller casts rays (view_point augmentation,
+        visibility sampling); refuses `raycasts=False` instead of failing on
+        the first cast_ray of the NavmeshBackend.
+    :return: habitat_sim.Simulator, or NavmeshBackend for nav_only without raycasts.
+    """
+    if nav_only and not raycasts and needs_raycasts:
+        raise ValueError(
+            f"Scene {scene_id}: nav_only=True with raycasts=False loads only the navmesh, "
+            "which cannot cast rays; keep raycasts=True for view_point augmentation and visibility sampling"
+        )
     scene_id = get_scene_path("val", scene_id)
+    if nav_only and not raycasts:
+        return NavmeshBackend(os.path.splitext(scene_id)[0] + ".navmesh", scene_id=scene_id)
+
     SIM_SETTINGS["scene"] = os.path.join(scene_id)
-    sim_cfg = make_simple_cfg(SIM_SETTINGS, use_equirectangular=False)
+    if nav_only:
+        sim_cfg = make_nav_cfg(SIM_SETTINGS)
+    else:
+        sim_cfg = make_simple_cfg(SIM_SETTINGS, use_equirectangular=False)
     sim = habitat_sim.Simulator(sim_cfg)
     return sim
 
@@ -35,12 +79,10 @@ def get_scene_path(split, name):
     # Get the scene path for a given split and name
     split = "val" if "val" in split else "train"
     
-    base_path = f"data/scene_datasets/hm3d_v0.2/{split}"
-    for folder_name in os.listdir(base_path):
-        if folder_name.endswith(f"-{name}"):
-            number = folder_name.split('-')[0]
-            return f"data/scene_datasets/hm3d_v0.2/{split}/{number}-{name}/{name}.basis.glb"
-    return None
+    glb = get_catalog(DEFAULT_SCENES_ROOT).path(split, name)
+    if glb is None:
+        return None
+    return os.path.join(DEFAULT_SCENES_ROOT, glb)
 
 
 def sample_navigable_points(
@@ -54,12 +96,21 @@ def sample_navigable_points(
     max_closest_height_diff: float = 1.0,
     use_viewpoints: bool = False,
     extra_vp_count: int = 30,
+    use_multigoal: bool = False,
+    point_pool: Optional[NavigablePointPool] = None,
+    use_distance_field: bool = False,
+    geodesic_cache: Optional[GeodesicCache] = None,
+    viewpoint_store: Optional[ViewpointStore] = None,
+    use_annulus: bool = False,
+    use_islands: bool = False,
+    level: str = "default",
 ) -> list:
     """
     Samples valid navigable start points for each episode, computes distances,
     and optionally augments view points.
     
-    :param sim: Initialized Habitat Simulator instance.
+    :param sim: Initialized Habitat Simulator instance, or any PathfinderBackend
+        (e.g. a GridNavmeshBackend to run without habitat_sim).
     :param episodes: List of episode dicts containing "view_points" and "object_pos".
     :param scene_dir: Base directory for scene files.
     :param scene_id: Identifier for the scene file.
@@ -68,122 +119,194 @@ def sample_navigable_points(
     :param max_height_diff: Maximum allowed height difference between start and goal.
     :param use_viewpoints: Whether to sample additional viewpoints.
     :param extra_vp_count: Number of extra viewpoints to sample if use_viewpoints is True.
+    :param use_multigoal: Evaluate each candidate start against all view_points of the
+        episode with one MultiGoalShortestPath query, instead of looping over goals.
+    :param point_pool: Precomputed navigable points of the scene. When given, candidate
+        starts are drawn from the pool points that already satisfy the height constraints.
+    :param use_distance_field: Pick starts from the cached geodesic distance field of each
+        goal over the point pool, before any rejection sampling. Requires `point_pool`.
+    :param geodesic_cache: Persistent cache consulted before every pathfinder query.
+    :param viewpoint_store: Columnar view_points of the scene, goal positions are
+        sliced from it instead of being rebuilt from the view_point dicts.
+    :param use_annulus: Draw candidates from the annulus around the goals that matches
+        the geodesic window (see sample_start_annulus) instead of the whole navmesh.
+    :param use_islands: Label the goals (and the point pool) with their navmesh island and
+        draw candidate starts only on the goals' islands. Episodes whose view_points are
+        all off the navmesh fail up front instead of after `max_tries`.
+    :param level: Key under which the sampling telemetry is recorded in SAMPLING_STATS.
     :return: Updated list of episodes with start positions, rotations, and distances.
     """
     
-    # 0b) Initialize the pathfinder
-    shortest_path = habitat_sim.ShortestPath()
-    
+    # 0b) Island of each pool point, computed once per scene
+    if use_islands and point_pool is not None:
+        point_pool.label_islands(sim)
+
     # 0c) Initialize episodes
     for ep in episodes:
         
         # If no view_point is found sample from object position
         if len(ep.get("view_points", [])) == 0:
             ep["view_points"].extend(
-                sample_additional_viewpoints(sim, ep["object_pos"], count=extra_vp_count*2, max_tries=max_tries, radius=1.0)
+                sample_additional_viewpoints_batched(sim, ep["object_pos"], count=extra_vp_count*2, max_tries=max_tries, radius=1.0)
             )
-            ep["closest_view_point"] = min(
-                ep["view_points"],
-                key=lambda v: euclidean_distance(
-                    np.array(v["agent_state"]["position"], dtype=float),
-                    np.array(ep["object_pos"], dtype=float),
-                    dims = (0,1,2)
-                )
-            )["agent_state"]["position"]
+            vp_positions = goal_array(ep)
+            closest = np.argmin(np.linalg.norm(vp_positions - np.array(ep["object_pos"], dtype=float), axis=1))
+            ep["closest_view_point"] = ep["view_points"][closest]["agent_state"]["position"]
         
         # skip fully‐valid episodes
         eucl = ep.get("euclidean_distance", float("inf"))
         geo  = ep.get("geodesic_distance",  float("inf"))
         # skip episodes already within the max‐distance envelope            
         if "start_position" in ep and eucl <= max_euclidean and min_geodesic <= geo <= max_geodesic:
+            if use_viewpoints:
+                augment_view_points(sim, ep, extra_vp_count, max_tries)
             continue
 
+        stats = SAMPLING_STATS[level]
+        stats["episodes"] += 1
+        drawn_before = _DRAWN["starts"]
+
         object_pos = np.array(ep["object_pos"], dtype=float)
+        scene_cache = geodesic_cache.for_scene(scene_key_from_id(ep["scene_id"])) if geodesic_cache else None
 
         # extract the closest view‐point’s Y once
         closest_y = ep["closest_view_point"][1]
 
-        global_best = {"geo": -1.0, "euclid": -1.0, "pos": None}
-        chosen = None
-
-        for goal_pos in all_goals(ep):  # iterate each candidate view_point
-            best_for_goal = {"geo": -1.0, "euclid": -1.0, "pos": None}
-
-            for _ in range(max_tries):
-                nav = sim.pathfinder.get_random_navigable_point(max_tries=max_tries)
-                start_pos = np.array([nav.x, nav.y, nav.z], dtype=float)
-
-                # 1) enforce BOTH height constraints
-                if abs(start_pos[1] - goal_pos[1]) > max_height_diff:
-                    continue
-                if abs(start_pos[1] - closest_y) > max_closest_height_diff:
-                    continue
-
-                # 2) geodesic
-                shortest_path.requested_start = start_pos.tolist()
-                shortest_path.requested_end   = goal_pos.tolist()
-                sim.pathfinder.find_path(shortest_path)
-                g = shortest_path.geodesic_distance
-                if g == float("inf"):
-                    continue
-
-                # 3) planar euclidean
-                e = float(np.linalg.norm(start_pos[[0,2]] - object_pos[[0,2]]))
-
-                # update best_for_goal (within full [min_geodesic, max_geodesic] ∧ euclid)
-                if e <= max_euclidean and min_geodesic <= g <= max_geodesic and g > best_for_goal["geo"]:
-                    best_for_goal.update({"geo": g, "euclid": e, "pos": start_pos.copy()})
-
-                # immediate accept if e ≤ max_euclidean AND g ∈ [min_geodesic, max_geodesic]
-                if e <= max_euclidean and min_geodesic <= g <= max_geodesic:
-                    chosen = {"pos": start_pos, "geo": g, "euclid": e}
-                    break
-
-            if chosen:
-                break
+        # islands of the goals, starts elsewhere can never reach them
+        islands = None
+        if use_islands:
+            goal_islands = goal_island_labels(sim, goal_array(ep, viewpoint_store))
+            islands = sorted(set(goal_islands.tolist()) - {-1})
+            if not islands:
+                stats["unreachable_goals"] += 1
+                raise RuntimeError(
+                    f"No view_point is on the navmesh for ep {ep['scene_id']} obj {ep['object_id']}"
+                )
 
-            # no perfect sample for this goal → update global_best
-            if best_for_goal["pos"] is not None and best_for_goal["geo"] > global_best["geo"]:
-                global_best = best_for_goal
+        chosen = None
+        if use_distance_field and point_pool is not None:
+            # array lookup in the cached distance field of this goal
+            goals = goal_array(ep, viewpoint_store)
+            chosen = sample_start_from_field(
+                sim, scene_key_from_id(ep["scene_id"]), goals, object_pos, closest_y,
+                point_pool=point_pool,
+                max_geodesic=max_geodesic,
+                max_euclidean=max_euclidean,
+                min_geodesic=min_geodesic,
+                max_height_diff=max_height_diff,
+                max_closest_height_diff=max_closest_height_diff,
+                geodesic_cache=scene_cache,
+            )
 
-        # fallback if needed
-        if chosen is None:
-            if global_best["pos"] is None:
-                # --- SECONDARY FALLBACK: drop geodesic+euclidean thresholds entirely, keep height only
-                fallback_best = {"geo": -1.0, "pos": None}
-                for _ in range(max_tries):
-                    nav = sim.pathfinder.get_random_navigable_point(max_tries=max_tries)
-                    sp = np.array([nav.x, nav.y, nav.z], dtype=float)
-                    # same floor + closest‐view height
-                    if abs(sp[1] - goal_pos[1]) > max_height_diff:  
+        if chosen is not None:
+            stats["distance_field"] += 1
+            global_best = {"geo": -1.0, "euclid": -1.0, "pos": None}
+        elif use_annulus:
+            # candidates only from the annulus around the goals
+            goals = goal_array(ep, viewpoint_store)
+            chosen = sample_start_annulus(
+                sim, goals, object_pos, closest_y,
+                max_tries=max_tries,
+                max_geodesic=max_geodesic,
+                max_euclidean=max_euclidean,
+                min_geodesic=min_geodesic,
+                max_height_diff=max_height_diff,
+                max_closest_height_diff=max_closest_height_diff,
+                point_pool=point_pool,
+                geodesic_cache=scene_cache,
+                stats=stats,
+                islands=islands,
+            )
+            global_best = {"geo": -1.0, "euclid": -1.0, "pos": None}
+        elif use_multigoal:
+            # all view_points are evaluated together for each candidate start
+            goals = goal_array(ep, viewpoint_store)
+            chosen = sample_start_multigoal(
+                sim, goals, object_pos, closest_y,
+                max_tries=max_tries,
+                max_geodesic=max_geodesic,
+                max_euclidean=max_euclidean,
+                min_geodesic=min_geodesic,
+                max_height_diff=max_height_diff,
+                max_closest_height_diff=max_closest_height_diff,
+                point_pool=point_pool,
+                geodesic_cache=scene_cache,
+                islands=islands,
+            )
+            global_best = {"geo": -1.0, "euclid": -1.0, "pos": None}
+        else:
+            global_best = {"geo": -1.0, "euclid": -1.0, "pos": None}
+            chosen = None
+
+            for i, goal_pos in enumerate(all_goals(ep, viewpoint_store)):  # iterate each candidate view_point
+                best_for_goal = {"geo": -1.0, "euclid": -1.0, "pos": None}
+                goal_island = None
+                if use_islands:
+                    if goal_islands[i] < 0:
                         continue
-                    if abs(sp[1] - closest_y) > max_closest_height_diff:
+                    goal_island = [int(goal_islands[i])]
+
+                for start_pos in draw_starts(
+                    sim, max_tries, point_pool, [goal_pos[1]], closest_y,
+                    max_height_diff, max_closest_height_diff, islands=goal_island,
+                ):
+                    # 1) enforce BOTH height constraints
+                    if abs(start_pos[1] - goal_pos[1]) > max_height_diff:
+                        continue
+                    if abs(start_pos[1] - closest_y) > max_closest_height_diff:
                         continue
 
-                    shortest_path.requested_start = sp.tolist()
-                    shortest_path.requested_end   = goal_pos.tolist()
-                    sim.pathfinder.find_path(shortest_path)
-                    g = shortest_path.geodesic_distance
+                    # 2) geodesic
+                    g = geodesic_distance(sim, start_pos, goal_pos, cache=scene_cache)
                     if g == float("inf"):
                         continue
 
-                    if g > fallback_best["geo"]:
-                        fallback_best.update({"geo": g, "pos": sp.copy()})
+                    # 3) planar euclidean
+                    e = float(np.linalg.norm(start_pos[[0,2]] - object_pos[[0,2]]))
+
+                    # update best_for_goal (within full [min_geodesic, max_geodesic] ∧ euclid)
+                    if e <= max_euclidean and min_geodesic <= g <= max_geodesic and g > best_for_goal["geo"]:
+                        best_for_goal.update({"geo": g, "euclid": e, "pos": start_pos.copy()})
 
-                if fallback_best["pos"] is None:
+                    # immediate accept if e ≤ max_euclidean AND g ∈ [min_geodesic, max_geodesic]
+                    if e <= max_euclidean and min_geodesic <= g <= max_geodesic:
+                        chosen = {"pos": start_pos, "geo": g, "euclid": e}
+                        break
+
+                if chosen:
+                    break
+
+                # no perfect sample for this goal → update global_best
+                if best_for_goal["pos"] is not None and best_for_goal["geo"] > global_best["geo"]:
+                    global_best = best_for_goal
+
+            # the relaxed fallback only targets the last view_point
+            goals = goal_pos[None, :]
+
+        # fallback if needed
+        if chosen is not None:
+            stats["accepted"] += 1
+        else:
+            if global_best["pos"] is None:
+                stats["relaxed_fallbacks"] += 1
+                # --- SECONDARY FALLBACK: drop geodesic+euclidean thresholds entirely, keep height only
+                chosen = sample_start_relaxed(
+                    sim, goals, object_pos, closest_y,
+                    max_tries=max_tries,
+                    max_height_diff=max_height_diff,
+                    max_closest_height_diff=max_closest_height_diff,
+                    point_pool=point_pool,
+                    geodesic_cache=scene_cache,
+                    islands=islands,
+                )
+                if chosen is None:
                     raise RuntimeError(
                         f"Even fully relaxed sampling failed for ep {ep['scene_id']} obj {ep['object_id']}"
                     )
-                chosen = {
-                    "pos":   fallback_best["pos"],
-                    "geo":   fallback_best["geo"],
-                    # recompute planar Euclid once for record:
-                    "euclid": float(np.linalg.norm(
-                        (fallback_best["pos"][[0,2]] - object_pos[[0,2]])
-                    ))
-                }
             else:
+                stats["fallbacks"] += 1
                 chosen = global_best
+        stats["tries"] += _DRAWN["starts"] - drawn_before
 
         # commit
         ep["start_position"]     = chosen["pos"].tolist()
@@ -197,21 +320,416 @@ def sample_navigable_points(
         )
 
         # optionally augment
-        if use_viewpoints and len(ep["view_points"]) < 40:
-            base_vp = ep["view_points"][0]["agent_state"]["position"]
-            ep["view_points"].extend(
-                sample_additional_viewpoints(sim, base_vp, count=extra_vp_count, max_tries=max_tries)
-            )
+        if use_viewpoints:
+            augment_view_points(sim, ep, extra_vp_count, max_tries)
 
     return episodes
 
 
+def augment_view_points(
+    sim: habitat_sim.Simulator,
+    ep: Dict[str, Any],
+    extra_vp_count: int,
+    max_tries: int,
+    max_view_points: int = 40,
+) -> None:
+    """Adds `extra_vp_count` view points around the first one, up to `max_view_points`."""
+    if len(ep["view_points"]) < max_view_points:
+        base_vp = ep["view_points"][0]["agent_state"]["position"]
+        ep["view_points"].extend(
+            sample_additional_viewpoints_batched(sim, base_vp, count=extra_vp_count, max_tries=max_tries)
+        )
+
+
+def validate_goat_starts(
+    sim: habitat_sim.Simulator,
+    candidates: List[Dict[str, Any]],
+    goals: np.ndarray,
+    object_pos: np.ndarray,
+    closest_y: float,
+    min_geodesic: float,
+    max_geodesic: float,
+    max_euclidean: float = 15.0,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    geodesic_cache: Optional[SceneGeodesicCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Checks the GOAT start candidates of an object against the same rules as
+    sample_navigable_points. Height, euclidean and straight-line bounds are
+    applied to all candidates at once, then each remaining distinct position
+    (GOAT repeats a start once per task) is accepted if any same-floor
+    view_point is in the geodesic window, with at most two path queries
+    (see window_geodesic).
+    
+    :return: The candidates in range, as {"pos", "rot", "geo", "euclid"}.
+    """
+    positions = np.array([c["pos"] for c in candidates], dtype=float).reshape(-1, 3)
+    _, first = np.unique(np.round(positions, 3), axis=0, return_index=True)
+    starts = positions[first]
+
+    # 1) vectorized filters, no path query
+    same_floor = np.abs(starts[:, None, 1] - goals[None, :, 1]) <= max_height_diff
+    keep = same_floor.any(axis=1) & (np.abs(starts[:, 1] - closest_y) <= max_closest_height_diff)
+    euclid = np.linalg.norm(starts[:, [0, 2]] - object_pos[[0, 2]], axis=1)
+    keep &= euclid <= max_euclidean
+    # the geodesic distance is at least the straight-line one
+    keep &= np.linalg.norm(starts[:, None, :] - goals[None, :, :], axis=2).min(axis=1) <= max_geodesic
+
+    # 2) geodesic window per remaining start
+    accepted = []
+    for k in np.flatnonzero(keep):
+        g = window_geodesic(sim, starts[k], goals[same_floor[k]], min_geodesic, max_geodesic, cache=geodesic_cache)
+        if g is not None:
+            choice = candidates[first[k]]
+            accepted.append({"pos": choice["pos"], "rot": choice["rot"], "geo": g, "euclid": float(euclid[k])})
+    return accepted
+
+
+def sample_start_from_field(
+    sim: habitat_sim.Simulator,
+    scene_key: str,
+    goals: np.ndarray,
+    object_pos: np.ndarray,
+    closest_y: float,
+    point_pool: NavigablePointPool,
+    max_geodesic: float = 18.0,
+    max_euclidean: float = 15.0,
+    min_geodesic: float = 3.0,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    max_verify: int = 5,
+    geodesic_cache: Optional[SceneGeodesicCache] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Chooses a start among the pool points whose distance-field value lies in
+    [min_geodesic, max_geodesic] and that satisfy the height and euclidean
+    constraints. Field values come from a point graph, so candidates are
+    verified in order with exact path queries: up to `max_verify` candidates,
+    at most two queries each (see window_geodesic).
+    The field holds the distance to the closest view_point, so starts that
+    are only in the window through a farther view_point are not selected
+    here; they are left to the sampler that runs when this returns None.
+    
+    :return: {"pos", "geo", "euclid"} of the accepted start, or None.
+    """
+    field = get_distance_field(sim, scene_key, point_pool, goals, limit=max_geodesic)
+    candidates = select_start_from_field(
+        field, point_pool, object_pos, goals[:, 1], closest_y,
+        max_geodesic=max_geodesic,
+        max_euclidean=max_euclidean,
+        min_geodesic=min_geodesic,
+        max_height_diff=max_height_diff,
+        max_closest_height_diff=max_closest_height_diff,
+    )
+
+    for i in candidates[:max_verify]:
+        start_pos = point_pool.points[i].astype(float)
+        same_floor = np.abs(goals[:, 1] - start_pos[1]) <= max_height_diff
+        g = window_geodesic(sim, start_pos, goals[same_floor], min_geodesic, max_geodesic, cache=geodesic_cache)
+        if g is not None:
+            e = float(np.linalg.norm(start_pos[[0,2]] - object_pos[[0,2]]))
+            return {"pos": start_pos, "geo": g, "euclid": e}
+
+    return None
+
+
+def sample_start_annulus(
+    sim: habitat_sim.Simulator,
+    goals: np.ndarray,
+    object_pos: np.ndarray,
+    closest_y: float,
+    max_tries: int = 100,
+    max_geodesic: float = 18.0,
+    max_euclidean: float = 15.0,
+    min_geodesic: float = 3.0,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    point_pool: Optional[NavigablePointPool] = None,
+    geodesic_cache: Optional[SceneGeodesicCache] = None,
+    num_stages: int = 3,
+    stats: Optional[Counter] = None,
+    islands: Optional[List[int]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Same acceptance rule as sample_start_multigoal (any same-floor view_point
+    in the geodesic window), but candidates are drawn from the annulus
+    around the goals that matches the geodesic window. The euclidean
+    distance never exceeds the geodesic one, so the outer radius
+    `max_geodesic` is exact, and starts beyond `min_geodesic` always pass the
+    lower bound. Detours can still make closer starts valid, so the inner
+    radius is halved at each of the `num_stages` stages (0 at the last one),
+    each stage getting an equal share of `max_tries`.
+    
+    :return: {"pos", "geo", "euclid"} of the accepted start, or None.
+    """
+    tries_per_stage = max(max_tries // num_stages, 1)
+    inner_radius = min_geodesic
+    for stage in range(num_stages):
+        if stage > 0:
+            # widen the annulus towards the goals
+            inner_radius /= 2.0
+            if stats is not None:
+                stats["annulus_widenings"] += 1
+        if stage == num_stages - 1:
+            inner_radius = 0.0
+        for start_pos in draw_starts_annulus(
+            sim, tries_per_stage, goals, inner_radius, max_geodesic, point_pool,
+            closest_y, max_height_diff, max_closest_height_diff, islands=islands,
+        ):
+            # 1) height constraints, goals on another floor are not considered
+            if abs(start_pos[1] - closest_y) > max_closest_height_diff:
+                continue
+            same_floor = np.abs(goals[:, 1] - start_pos[1]) <= max_height_diff
+            if not same_floor.any():
+                continue
+
+            # 2) planar euclidean to the object
+            e = float(np.linalg.norm(start_pos[[0,2]] - object_pos[[0,2]]))
+            if e > max_euclidean:
+                continue
+
+            # 3) geodesic to the view_points that can be in the window
+            g = window_geodesic(sim, start_pos, goals[same_floor], min_geodesic, max_geodesic, cache=geodesic_cache)
+            if g is not None:
+                return {"pos": start_pos, "geo": g, "euclid": e}
+
+    return None
+
+
+def sample_start_multigoal(
+    sim: habitat_sim.Simulator,
+    goals: np.ndarray,
+    object_pos: np.ndarray,
+    closest_y: float,
+    max_tries: int = 100,
+    max_geodesic: float = 18.0,
+    max_euclidean: float = 15.0,
+    min_geodesic: float = 3.0,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    point_pool: Optional[NavigablePointPool] = None,
+    geodesic_cache: Optional[SceneGeodesicCache] = None,
+    islands: Optional[List[int]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Draws random starts and evaluates each one against all the view_points
+    on the same floor with a single MultiGoalShortestPath query.
+    A start is accepted with the rule of the per-goal loop: planar euclidean
+    distance within `max_euclidean` and geodesic distance to any same-floor
+    view_point within [min_geodesic, max_geodesic] (see window_geodesic).
+    
+    :return: {"pos", "geo", "euclid"} of the accepted start, or None.
+    """
+    for start_pos in draw_starts(
+        sim, max_tries, point_pool, goals[:, 1], closest_y,
+        max_height_diff, max_closest_height_diff, islands=islands,
+    ):
+        # 1) height constraints, goals on another floor are not considered
+        if abs(start_pos[1] - closest_y) > max_closest_height_diff:
+            continue
+        same_floor = np.abs(goals[:, 1] - start_pos[1]) <= max_height_diff
+        if not same_floor.any():
+            continue
+
+        # 2) planar euclidean, cheaper than a path query
+        e = float(np.linalg.norm(start_pos[[0,2]] - object_pos[[0,2]]))
+        if e > max_euclidean:
+            continue
+
+        # 3) geodesic to the view_points that can be in the window
+        g = window_geodesic(sim, start_pos, goals[same_floor], min_geodesic, max_geodesic, cache=geodesic_cache)
+        if g is not None:
+            return {"pos": start_pos, "geo": g, "euclid": e}
+
+    return None
+
+
+def window_geodesic(
+    sim: habitat_sim.Simulator,
+    start_pos: np.ndarray,
+    goals: np.ndarray,
+    min_geodesic: float,
+    max_geodesic: float,
+    cache: Optional[SceneGeodesicCache] = None,
+) -> Optional[float]:
+    """
+    Geodesic distance from `start_pos` to a view_point within
+    [min_geodesic, max_geodesic], None if there is none, with at most two
+    multi-goal queries whatever the number of view_points.
+    
+    The geodesic distance is never shorter than the straight line, so
+    view_points farther than `max_geodesic` are skipped and the ones at least
+    `min_geodesic` away can only fail the upper bound: one query over them
+    decides. The view_points nearer than `min_geodesic` only qualify through
+    a detour and share a second query, which misses a detoured view_point
+    only when another near one is reachable in less than `min_geodesic`.
+    """
+    straight = np.linalg.norm(goals - start_pos, axis=1)
+    far = (straight >= min_geodesic) & (straight <= max_geodesic)
+    if far.any():
+        g = geodesic_distance(sim, start_pos, goals[far], cache=cache)
+        if g <= max_geodesic:
+            return g
+    near = straight < min_geodesic
+    if near.any():
+        g = geodesic_distance(sim, start_pos, goals[near], cache=cache)
+        if min_geodesic <= g <= max_geodesic:
+            return g
+    return None
+
+
+def sample_start_relaxed(
+    sim: habitat_sim.Simulator,
+    goals: np.ndarray,
+    object_pos: np.ndarray,
+    closest_y: float,
+    max_tries: int = 100,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    point_pool: Optional[NavigablePointPool] = None,
+    geodesic_cache: Optional[SceneGeodesicCache] = None,
+    islands: Optional[List[int]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Fallback sampling without geodesic and euclidean thresholds: keeps only the
+    height constraints and returns the furthest reachable start.
+    
+    :return: {"pos", "geo", "euclid"} of the furthest start, or None.
+    """
+    fallback_best = {"geo": -1.0, "pos": None}
+    for sp in draw_starts(
+        sim, max_tries, point_pool, goals[:, 1], closest_y,
+        max_height_diff, max_closest_height_diff, islands=islands,
+    ):
+        # same floor + closest‐view height
+        same_floor = np.abs(goals[:, 1] - sp[1]) <= max_height_diff
+        if not same_floor.any():
+            continue
+        if abs(sp[1] - closest_y) > max_closest_height_diff:
+            continue
+
+        g = geodesic_distance(sim, sp, goals[same_floor], cache=geodesic_cache)
+        if g == float("inf"):
+            continue
+
+        if g > fallback_best["geo"]:
+            fallback_best.update({"geo": g, "pos": sp.copy()})
+
+    if fallback_best["pos"] is None:
+        return None
+    return {
+        "pos":   fallback_best["pos"],
+        "geo":   fallback_best["geo"],
+        # recompute planar Euclid once for record:
+        "euclid": float(np.linalg.norm(
+            (fallback_best["pos"][[0,2]] - object_pos[[0,2]])
+        ))
+    }
+
+
+def goal_island_labels(sim: habitat_sim.Simulator, goals: np.ndarray) -> np.ndarray:
+    """Navmesh island of each goal, -1 for goals off the navmesh."""
+    backend = as_backend(sim)
+    return np.array([backend.get_island(goal) for goal in goals], dtype=np.int32)
+
+
+def draw_starts(
+    sim: habitat_sim.Simulator,
+    max_tries: int,
+    point_pool: Optional[NavigablePointPool] = None,
+    goal_heights: Optional[List[float]] = None,
+    closest_y: Optional[float] = None,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    islands: Optional[List[int]] = None,
+):
+    """
+    Yields up to `max_tries` candidate start positions. Without a pool each
+    candidate is a fresh pathfinder sample; with a pool, candidates are drawn
+    without replacement among the pool points of the goals' floor that pass
+    the height constraints, selected with a single vectorized mask.
+    With `islands`, candidates are only drawn on those navmesh islands.
+    """
+    if point_pool is None:
+        backend = as_backend(sim)
+        for _ in range(max_tries):
+            island_index = int(np.random.choice(islands)) if islands else -1
+            _DRAWN["starts"] += 1
+            yield backend.get_random_navigable_point(max_tries=max_tries, island_index=island_index)
+        return
+
+    candidates = point_pool.candidates(goal_heights, max_height_diff, closest_y, max_closest_height_diff, islands)
+    if len(candidates) == 0:
+        return
+    picks = np.random.choice(len(candidates), size=min(max_tries, len(candidates)), replace=False)
+    for i in picks:
+        _DRAWN["starts"] += 1
+        yield candidates[i].astype(float)
+
+
+def draw_starts_annulus(
+    sim: habitat_sim.Simulator,
+    max_tries: int,
+    goals: np.ndarray,
+    inner_radius: float,
+    outer_radius: float,
+    point_pool: Optional[NavigablePointPool] = None,
+    closest_y: Optional[float] = None,
+    max_height_diff: float = 0.5,
+    max_closest_height_diff: float = 1.0,
+    islands: Optional[List[int]] = None,
+):
+    """
+    Yields up to `max_tries` candidate starts whose distance to the closest
+    goal lies in [inner_radius, outer_radius]. Pool points are masked in one
+    vectorized pass; without a pool, points are drawn near a random goal with
+    get_random_navigable_point_near and the ones inside the inner radius are
+    dropped before any path query, as are the ones off `islands`.
+    """
+    if point_pool is not None:
+        candidates = point_pool.candidates(goals[:, 1], max_height_diff, closest_y, max_closest_height_diff, islands)
+        if len(candidates) == 0:
+            return
+        dist = np.linalg.norm(candidates[:, None, :] - goals[None, :, :].astype(np.float32), axis=2).min(axis=1)
+        in_annulus = np.flatnonzero((dist >= inner_radius) & (dist <= outer_radius))
+        picks = np.random.permutation(in_annulus)[:max_tries]
+        for i in picks:
+            _DRAWN["starts"] += 1
+            yield candidates[i].astype(float)
+        return
+
+    backend = as_backend(sim)
+    for _ in range(max_tries):
+        goal = goals[np.random.randint(len(goals))]
+        start_pos = backend.get_random_navigable_point_near(goal, radius=outer_radius, max_tries=20)
+        # Every draw counts as a try, rejected or not
+        _DRAWN["starts"] += 1
+        if not np.isfinite(start_pos).all():
+            continue
+        if np.linalg.norm(goals - start_pos, axis=1).min() < inner_radius:
+            continue
+        if islands and backend.get_island(start_pos) not in islands:
+            continue
+        yield start_pos
+
+
 def prepare_episode_data(
     sim: habitat_sim.Simulator,
     episodes: List[Dict[str, Any]],
     base_path: str = "data/datasets/goat_bench/hm3d/v1/",
     level="easy",
-    use_view_points: bool = False
+    use_view_points: bool = False,
+    use_multigoal: bool = False,
+    use_point_pool: bool = False,
+    point_pool_size: int = 5000,
+    point_pool_cache_dir: Optional[str] = None,
+    use_distance_field: bool = False,
+    geodesic_cache: Optional[GeodesicCache] = None,
+    scene_data_cache_dir: Optional[str] = None,
+    use_annulus: bool = False,
+    validate_starts: bool = False,
+    use_islands: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     For each episode in `episodes`, attach:
@@ -220,7 +738,11 @@ def prepare_episode_data(
 
     Loads and merges scene_data from the three splits:
       "val_seen", "val_seen_synonyms", "val_unseen"
-    into a single combined scene_data per scene_id.
+    into a single combined scene_data per scene_id. The merged lookups are
+    cached per scene (and snapshotted to `scene_data_cache_dir` if given).
+    With `validate_starts`, the GOAT start candidates of each object are
+    checked with path queries first, and only episodes without a valid one
+    go through random start sampling.
     """
     assert sim is not None, "Simulator must be initialized before preparing episodes."
     
@@ -238,18 +760,19 @@ def prepare_episode_data(
         max_geo_dist = 4.0
         min_geo_dist = 2.0
     
-    # Prepare empty merged containers
-    merged_goals = load_merged_scene_data(
+    # Merged GOAT data of the scene, parsed once per run
+    scene_data = load_scene_lookups(
         base_path=base_path,
         scene_id=episodes[0]["scene_id"],
-        splits=splits
+        splits=splits,
+        cache_dir=scene_data_cache_dir,
     )
+    start_lookup = scene_data["start_lookup"]
+    viewpoint_store = scene_data["viewpoint_store"] if use_view_points else None
 
-    # Build lookups from merged data
-    view_point_lookup, start_lookup = build_lookups(
-        merged=merged_goals,
-        use_view_points=use_view_points
-    )
+    # GOAT starts in range per object, shared by the episodes of that object
+    valid_goat_starts: Dict[Any, List[Dict[str, Any]]] = {}
+    scene_cache = geodesic_cache.for_scene(scene_key_from_id(episodes[0]["scene_id"])) if geodesic_cache else None
         
     # Finally, attach to each input episode
     for ep in episodes:
@@ -257,27 +780,39 @@ def prepare_episode_data(
 
         # view_points
         if use_view_points:
-            ep["view_points"] = view_point_lookup.get(obj_id)
-            if ep["view_points"] is None: ep["view_points"] = []
+            # Copied, view_points are extended per episode and the lookups are cached
+            ep["view_points"] = list(viewpoint_store.view_points(obj_id))
     
             # Save the closet view_point to the object position
-            try:
-                closest_vp = min(
-                    ep["view_points"],
-                    key=lambda v: euclidean_distance(
-                        np.array(v["agent_state"]["position"], dtype=float),
-                        np.array(ep["object_pos"], dtype=float),
-                        dims=(0,1,2)
-                    ),
-                )
-                ep["closest_view_point"] = closest_vp["agent_state"]["position"]
-            except ValueError:
+            closest_vp = viewpoint_store.closest(obj_id, ep["object_pos"])
+            if closest_vp is None:
                 # In the case no view_point is defined
                 continue
+            ep["closest_view_point"] = closest_vp
 
         # start_position & rotation
         candidates = start_lookup.get(obj_id) or []
 
+        if candidates and validate_starts and "closest_view_point" in ep:
+            # GOAT starts already in range need no random sampling
+            if obj_id not in valid_goat_starts:
+                valid_goat_starts[obj_id] = validate_goat_starts(
+                    sim, candidates, goal_array(ep, viewpoint_store),
+                    np.array(ep["object_pos"], dtype=float), ep["closest_view_point"][1],
+                    min_geodesic=min_geo_dist,
+                    max_geodesic=max_geo_dist,
+                    geodesic_cache=scene_cache,
+                )
+            if valid_goat_starts[obj_id]:
+                # One at random among the valid ones, as for unvalidated GOAT starts
+                choice = random.choice(valid_goat_starts[obj_id])
+                ep["start_position"] = choice["pos"]
+                ep["start_rotation"] = choice["rot"]
+                ep["geodesic_distance"] = choice["geo"]
+                ep["euclidean_distance"] = choice["euclid"]
+                SAMPLING_STATS[level]["goat_starts"] += 1
+                continue
+
         if candidates:
             USE_FURTHERST = False
             if USE_FURTHERST:
@@ -305,6 +840,16 @@ def prepare_episode_data(
             ep["start_rotation"] = best_choice["rot"]
             ep["euclidean_distance"] = max_distance
         
+    # Navigable points of the scene, shared by all its episodes
+    point_pool = None
+    if use_point_pool:
+        point_pool = get_point_pool(
+            sim,
+            scene_key=scene_key_from_id(episodes[0]["scene_id"]),
+            num_points=point_pool_size,
+            cache_dir=point_pool_cache_dir,
+        )
+    
     # Use Haibtat-sim to sample a navigable point
     episodes = sample_navigable_points(
         sim=sim,
@@ -315,6 +860,14 @@ def prepare_episode_data(
         max_height_diff= 0.5,
         use_viewpoints= use_view_points,
         extra_vp_count = 15,
+        use_multigoal=use_multigoal,
+        point_pool=point_pool,
+        use_distance_field=use_distance_field,
+        geodesic_cache=geodesic_cache,
+        viewpoint_store=viewpoint_store,
+        use_annulus=use_annulus,
+        use_islands=use_islands,
+        level=level,
     )
     
     # Delete closest_view_point
@@ -325,5 +878,49 @@ def prepare_episode_data(
     return episodes
 
 
+def sampling_report() -> List[str]:
+    """One line per level summarizing SAMPLING_STATS."""
+    lines = []
+    for level, stats in SAMPLING_STATS.items():
+        episodes = max(stats["episodes"], 1)
+        lines.append(
+            f"{level}: {stats['episodes']} episodes, "
+            f"{stats['accepted'] / episodes:.1%} accepted in range "
+            f"({stats['distance_field']} from distance fields), "
+            f"{stats['tries'] / episodes:.1f} tries/episode, "
+            f"{stats['goat_starts']} GOAT starts kept, "
+            f"{stats['fallbacks']} fallbacks, {stats['relaxed_fallbacks']} relaxed fallbacks, "
+            f"{stats['annulus_widenings']} annulus widenings, "
+            f"{stats['unreachable_goals']} unreachable goals"
+        )
+    return lines
 
 
+def benchmark_simulator_startup(scene_names: List[str], repeats: int = 3) -> None:
+    """
+    Compares per-scene startup time of the full simulator (renderer + RGB
+    sensor), the headless nav-only simulator and the bare navmesh.
+    Needs habitat_sim and the HM3D scenes.
+    """
+    modes = {
+        "full": {"nav_only": False},
+        "nav only": {"nav_only": True, "raycasts": True},
+        "navmesh only": {"nav_only": True, "raycasts": False},
+    }
+    for name, kwargs in modes.items():
+        times = []
+        for scene_name in scene_names:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                sim = initialize_simulator(scene_name, **kwargs)
+                times.append(time.perf_counter() - start)
+                sim.close()
+        print(f"{name:>12}: {np.mean(times):6.3f}s mean startup ({np.max(times):.3f}s max) over {len(times)} loads")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark simulator startup modes")
+    parser.add_argument("--scenes", type=str, nargs="+", default=["4ok3usBNeis"], help="Scene names to load")
+    parser.add_argument("--repeats", type=int, default=3, help="Loads per scene and mode")
+    args = parser.parse_args()
+    benchmark_simulator_startup(args.scenes, repeats=args.repeats)
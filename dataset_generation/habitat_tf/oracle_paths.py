@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import os
+import gzip
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+from habitat_tf.backends import as_backend
+from habitat_tf.nav_episode import initialize_simulator
+
+# Habitat ObjectNav action ids
+STOP, MOVE_FORWARD, TURN_LEFT, TURN_RIGHT = 0, 1, 2, 3
+
+
+def path_to_actions(
+    sim,
+    start_position: List[float],
+    start_rotation: List[float],
+    goals: np.ndarray,
+    forward_step: float = 0.25,
+    turn_angle: float = 30.0,
+    max_actions: int = 500,
+    success_distance: float = 0.25,
+) -> Tuple[List[int], np.ndarray, Optional[str]]:
+    """
+    Greedy geodesic follower: turns towards the next waypoint of the shortest
+    path until within half a turn, then moves forward, and STOPs once the
+    geodesic distance to the nearest view_point is within `success_distance`.
+    Every MOVE_FORWARD is replayed on the navmesh with try_step and only kept
+    if it is collision-free and shortens the geodesic distance, so the actions
+    replay the same with or without sliding; otherwise the agent keeps turning
+    the same way and tries again, up to a full turn.
+
+    :param sim: habitat_sim.Simulator or PathfinderBackend.
+    :param start_position: Start position [x, y, z].
+    :param start_rotation: Start quaternion [x, y, z, w], yaw around +y.
+    :param goals: View_point positions (N, 3).
+    :param forward_step: MOVE_FORWARD distance (meters).
+    :param turn_angle: TURN_LEFT/TURN_RIGHT angle (degrees).
+    :param max_actions: Actions before giving up, STOP included.
+    :param success_distance: Geodesic distance to a view_point to STOP at.
+    :return: (action ids ending with STOP, final position, None on success or
+        the failure: "no_path", "stuck" or "max_actions")
+    """
+    backend = as_backend(sim)
+    turn = np.deg2rad(turn_angle)
+    max_search_turns = int(round(2 * np.pi / turn)) - 1
+    position = np.asarray(start_position, dtype=float)
+    yaw = 2.0 * np.arctan2(start_rotation[1], start_rotation[3])
+
+    distance, points = backend.find_path(position, goals)
+    if not np.isfinite(distance):
+        return [STOP], position, "no_path"
+
+    actions = []
+    search_turns, search_dir = 0, 1
+    while distance > success_distance:
+        if len(actions) >= max_actions - 1:
+            return actions + [STOP], position, "max_actions"
+
+        # Aim at the first waypoint at least a step away, or the last one
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        ahead = np.linalg.norm(points[:, [0, 2]] - position[[0, 2]], axis=1) >= forward_step
+        waypoint = points[np.argmax(ahead)] if ahead.any() else points[-1]
+        delta = waypoint[[0, 2]] - position[[0, 2]]
+        # Agents face -z, yaw rotates counter-clockwise around +y
+        target_yaw = np.arctan2(-delta[0], -delta[1])
+        diff = (target_yaw - yaw + np.pi) % (2 * np.pi) - np.pi
+        if search_turns == 0 and abs(diff) > turn / 2:
+            actions.append(TURN_LEFT if diff > 0 else TURN_RIGHT)
+            yaw += turn if diff > 0 else -turn
+            continue
+
+        target = position + forward_step * np.array([-np.sin(yaw), 0.0, -np.cos(yaw)])
+        new_position = backend.try_step(position, target)
+        if np.linalg.norm((new_position - target)[[0, 2]]) < 1e-3:
+            new_distance, new_points = backend.find_path(new_position, goals)
+            if new_distance < distance:
+                actions.append(MOVE_FORWARD)
+                position, distance, points = new_position, new_distance, new_points
+                search_turns = 0
+                continue
+
+        # Blocked or no progress: keep turning the same way and try again
+        if search_turns == 0:
+            search_dir = 1 if diff >= 0 else -1
+        search_turns += 1
+        if search_turns > max_search_turns:
+            return actions + [STOP], position, "stuck"
+        actions.append(TURN_LEFT if search_dir > 0 else TURN_RIGHT)
+        yaw += search_dir * turn
+
+    actions.append(STOP)
+    return actions, position, None
+
+
+def run_length_encode(actions: List[int]) -> List[List[int]]:
+    """[1, 1, 1, 2, 0] -> [[1, 3], [2, 1], [0, 1]]"""
+    encoded = []
+    for action in actions:
+        if encoded and encoded[-1][0] == action:
+            encoded[-1][1] += 1
+        else:
+            encoded.append([int(action), 1])
+    return encoded
+
+
+def run_length_decode(encoded: List[List[int]]) -> List[int]:
+    return [action for action, count in encoded for _ in range(count)]
+
+
+def episode_goal_positions(ep: Dict[str, Any], goals_by_category: Dict[str, List[Dict[str, Any]]]) -> np.ndarray:
+    """View_point positions (N, 3) of the goal objects of an active episode."""
+    object_ids = ep["object_id"] if isinstance(ep["object_id"], list) else [ep["object_id"]]
+    goal_key = f"{os.path.basename(ep['scene_id'])}_{ep['object_category']}"
+    return np.array([
+        vp["agent_state"]["position"]
+        for goal in goals_by_category.get(goal_key, [])
+        if goal["object_name"] in object_ids
+        for vp in goal["view_points"]
+    ], dtype=float).reshape(-1, 3)
+
+
+def add_oracle_paths(
+    sim,
+    scene: Dict[str, Any],
+    forward_step: float = 0.25,
+    turn_angle: float = 30.0,
+    max_actions: int = 500,
+    success_distance: float = 0.25,
+) -> int:
+    """
+    Adds the oracle actions from `start_position` to the nearest view_point of
+    each episode as `info["shortest_path_rle"]`, replayed on the navmesh with
+    path_to_actions. Episodes whose replay does not reach a view_point get
+    None and `info["shortest_path_failure"]` ("no_path", "stuck" or
+    "max_actions").
+
+    :return: Number of episodes with a path.
+    """
+    backend = as_backend(sim)
+    n_paths = 0
+    for ep in scene["episodes"]:
+        info = ep.setdefault("info", {})
+        info.pop("shortest_path_failure", None)
+        goals = episode_goal_positions(ep, scene["goals_by_category"])
+        rle = None
+        if len(goals) == 0:
+            info["shortest_path_failure"] = "no_path"
+        else:
+            actions, _, failure = path_to_actions(
+                backend, ep["start_position"], ep["start_rotation"], goals,
+                forward_step, turn_angle, max_actions, success_distance,
+            )
+            if failure is None:
+                rle = run_length_encode(actions)
+                n_paths += 1
+            else:
+                info["shortest_path_failure"] = failure
+        info["shortest_path_rle"] = rle
+    return n_paths
+
+
+def process_scene_file(
+    input_path: str,
+    output_path: str,
+    forward_step: float = 0.25,
+    turn_angle: float = 30.0,
+    max_actions: int = 500,
+    success_distance: float = 0.25,
+) -> List[int]:
+    """
+    Adds oracle paths to a single content file with its own nav-only simulator.
+
+    :return: [number of episodes, number of episodes with a path]
+    """
+    with gzip.open(input_path, "rt", encoding="utf-8") as f:
+        scene = json.load(f)
+    if not scene["episodes"]:
+        return [0, 0]
+
+    scene_name = os.path.basename(scene["episodes"][0]["scene_id"]).split(".")[0]
+    sim = initialize_simulator(scene_name, nav_only=True, raycasts=False)
+    try:
+        n_paths = add_oracle_paths(sim, scene, forward_step, turn_angle, max_actions, success_distance)
+    finally:
+        sim.close()
+
+    with gzip.open(output_path, "wt", encoding="utf-8") as f:
+        json.dump(scene, f, indent=2)
+    return [len(scene["episodes"]), n_paths]
+
+
+def main(args):
+    """
+    Post-processes an active split: every episode gets the run-length encoded
+    oracle actions to its nearest view_point, checked by replaying them on
+    the navmesh, so consumers no longer need a
+    greedy follower at load time. Scenes are processed in parallel, one
+    nav-only simulator per worker.
+    """
+    content_dir = os.path.join(args.split_path, args.level, "content")
+    output_dir = os.path.join(args.output_path or args.split_path, args.level, "content")
+    os.makedirs(output_dir, exist_ok=True)
+
+    scene_files = sorted(f for f in os.listdir(content_dir) if f.endswith(".json.gz"))
+    jobs = [
+        (
+            os.path.join(content_dir, file_name),
+            os.path.join(output_dir, file_name),
+            args.forward_step,
+            args.turn_angle,
+            args.max_actions,
+            args.success_distance,
+        )
+        for file_name in scene_files
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.num_workers) as executor:
+        counts = np.array(list(executor.map(process_scene_file, *zip(*jobs)))).reshape(-1, 2).sum(axis=0)
+
+    print(f"Oracle paths for {counts[1]}/{counts[0]} episodes in {len(scene_files)} scenes "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Content written to {output_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute oracle shortest paths of an active split")
+    parser.add_argument("--split_path", type=str, default="data/datasets/eai_pers/active/val", help="Path of the split")
+    parser.add_argument("--level", type=str, default="easy", help="Dataset difficulty level")
+    parser.add_argument("--output_path", type=str, default=None, help="Output split path, the content files are updated in place if not set")
+    parser.add_argument("--num_workers", type=int, default=4, help="Scenes processed in parallel")
+    parser.add_argument("--forward_step", type=float, default=0.25, help="MOVE_FORWARD distance (meters)")
+    parser.add_argument("--turn_angle", type=float, default=30.0, help="TURN_LEFT/TURN_RIGHT angle (degrees)")
+    parser.add_argument("--max_actions", type=int, default=500, help="Maximum actions per episode, STOP included")
+    parser.add_argument("--success_distance", type=float, default=0.25, help="Geodesic distance to a view_point at which the oracle STOPs (meters)")
+
+    args = parser.parse_args()
+    main(args)
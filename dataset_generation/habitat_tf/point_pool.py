@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import numpy as np
+from typing import Dict, List, Optional
+
+try:
+    import habitat_sim
+except ImportError:  # pools can be built from any PathfinderBackend
+    habitat_sim = None
+
+from habitat_tf.backends import as_backend
+
+# Pools already built in this process, shared by all episodes of a scene
+_POINT_POOLS: Dict[str, "NavigablePointPool"] = {}
+
+
+class NavigablePointPool:
+    """
+    Navigable points of a scene sampled once and stored as a float32 (N, 3)
+    array sorted by height. Points are bucketed by floor: consecutive heights
+    closer than `floor_gap` belong to the same floor bucket.
+    """
+
+    def __init__(self, points: np.ndarray, floor_gap: float = 0.5):
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        points = points[np.isfinite(points).all(axis=1)]
+        self.points = points[np.argsort(points[:, 1], kind="stable")]
+
+        # Floor buckets as [start, end) slices of the sorted points
+        heights = self.points[:, 1]
+        breaks = np.flatnonzero(np.diff(heights) > floor_gap) + 1
+        starts = np.concatenate(([0], breaks)).astype(int)
+        ends = np.concatenate((breaks, [len(heights)])).astype(int)
+        self.floor_slices = [(int(s), int(e)) for s, e in zip(starts, ends) if e > s]
+        self.floor_bounds = np.array(
+            [(heights[s], heights[e - 1]) for s, e in self.floor_slices], dtype=np.float32
+        ).reshape(-1, 2)
+        # Navmesh island of each point, see label_islands
+        self.islands: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def floor_heights(self) -> np.ndarray:
+        """Mean height of each floor bucket, ascending."""
+        return np.array([self.points[s:e, 1].mean() for s, e in self.floor_slices], dtype=np.float32)
+
+    def label_islands(self, sim: habitat_sim.Simulator) -> np.ndarray:
+        """Labels each point with its navmesh island once, int32 array of shape (N,)."""
+        if self.islands is None:
+            backend = as_backend(sim)
+            self.islands = np.array([backend.get_island(p) for p in self.points], dtype=np.int32)
+        return self.islands
+
+    def candidates(
+        self,
+        goal_heights: List[float],
+        max_height_diff: float,
+        closest_y: Optional[float] = None,
+        max_closest_height_diff: float = 1.0,
+        islands: Optional[List[int]] = None,
+    ) -> np.ndarray:
+        """
+        Points within `max_height_diff` of at least one goal height and within
+        `max_closest_height_diff` of `closest_y`. Only the floor buckets that
+        overlap the goal heights are masked. With `islands` (requires
+        label_islands), only points on one of those islands are kept.
+
+        :return: Candidate points, shape (M, 3).
+        """
+        goal_heights = np.asarray(goal_heights, dtype=np.float32).reshape(-1)
+        if len(goal_heights) == 0 or len(self.points) == 0:
+            return self.points[:0]
+
+        lo, hi = goal_heights.min() - max_height_diff, goal_heights.max() + max_height_diff
+        overlapping = (self.floor_bounds[:, 1] >= lo) & (self.floor_bounds[:, 0] <= hi)
+        if not overlapping.any():
+            return self.points[:0]
+        bucket_slices = [slice(s, e) for (s, e), keep in zip(self.floor_slices, overlapping) if keep]
+        bucket = np.concatenate([self.points[sl] for sl in bucket_slices])
+
+        y = bucket[:, 1]
+        mask = (np.abs(y[:, None] - goal_heights[None, :]) <= max_height_diff).any(axis=1)
+        if closest_y is not None:
+            mask &= np.abs(y - closest_y) <= max_closest_height_diff
+        if islands is not None and self.islands is not None:
+            bucket_islands = np.concatenate([self.islands[sl] for sl in bucket_slices])
+            mask &= np.isin(bucket_islands, np.asarray(islands))
+        return bucket[mask]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(path, self.points)
+
+    @classmethod
+    def load(cls, path: str, floor_gap: float = 0.5) -> "NavigablePointPool":
+        return cls(np.load(path), floor_gap=floor_gap)
+
+    @classmethod
+    def from_simulator(
+        cls,
+        sim: habitat_sim.Simulator,
+        num_points: int = 5000,
+        floor_gap: float = 0.5,
+    ) -> "NavigablePointPool":
+        backend = as_backend(sim)
+        points = np.array(
+            [backend.get_random_navigable_point() for _ in range(num_points)],
+            dtype=np.float32,
+        )
+        return cls(points, floor_gap=floor_gap)
+
+
+def get_point_pool(
+    sim: habitat_sim.Simulator,
+    scene_key: str,
+    num_points: int = 5000,
+    cache_dir: Optional[str] = None,
+) -> NavigablePointPool:
+    """
+    Returns the point pool of a scene, building it on first use. When
+    `cache_dir` is set the pool is also stored as `<scene_key>.npy` and
+    reloaded on later runs.
+
+    :param sim: Initialized Habitat Simulator instance for the scene.
+    :param scene_key: Scene name, e.g. "4ok3usBNeis".
+    :param num_points: Number of navigable points to sample.
+    :param cache_dir: Optional directory for the on-disk cache.
+    :return: The scene's NavigablePointPool.
+    """
+    if scene_key in _POINT_POOLS:
+        return _POINT_POOLS[scene_key]
+
+    cache_path = os.path.join(cache_dir, f"{scene_key}.npy") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        pool = NavigablePointPool.load(cache_path)
+    else:
+        pool = NavigablePointPool.from_simulator(sim, num_points=num_points)
+        if cache_path:
+            pool.save(cache_path)
+
+    _POINT_POOLS[scene_key] = pool
+    return pool
+
+
+def scene_key_from_id(scene_id: str) -> str:
+    """'hm3d_v0.2/val/00877-4ok3usBNeis/4ok3usBNeis.basis.glb' -> '4ok3usBNeis'"""
+    return os.path.basename(scene_id).split(".")[0]
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import tempfile
+from typing import Any, Dict, Optional
+
+DEFAULT_SCENES_ROOT = "data/scene_datasets/hm3d_v0.2"
+CATALOGS_DIR = "scene_catalogs"
+
+# Catalogs already loaded in this process, per scenes root
+_CATALOGS: Dict[str, "SceneCatalog"] = {}
+
+
+def default_index_path(root: str) -> str:
+    """
+    Index of a scenes root, kept outside the dataset folder:
+    data/scene_datasets/hm3d_v0.2 -> data/scene_catalogs/hm3d_v0.2.json
+    """
+    root = os.path.abspath(root)
+    data_dir = os.path.dirname(os.path.dirname(root))
+    return os.path.join(data_dir, CATALOGS_DIR, f"{os.path.basename(root)}.json")
+
+
+def scan_scene_folder(split: str, folder_path: str) -> Dict[str, Any]:
+    """Catalog entry of a single scene folder, e.g. <root>/val/00877-4ok3usBNeis."""
+    folder_name = os.path.basename(folder_path)
+    number, name = folder_name.split("-", 1)
+    files = set(os.listdir(folder_path))
+
+    def rel(file_name):
+        return f"{split}/{folder_name}/{file_name}" if file_name in files else None
+
+    return {
+        "folder": folder_name,
+        "number": number,
+        "glb": rel(f"{name}.basis.glb"),
+        "navmesh": rel(f"{name}.basis.navmesh"),
+        "semantic_glb": rel(f"{name}.semantic.glb"),
+        "semantic_txt": rel(f"{name}.semantic.txt"),
+        "num_floors": None,
+        "mtime": os.path.getmtime(folder_path),
+    }
+
+
+class SceneCatalog:
+    """
+    Index of the HM3D scenes under `root`, per split and scene name:
+        {"folder": "00877-4ok3usBNeis", "number": "00877",
+         "glb", "navmesh", "semantic_glb", "semantic_txt": paths relative to root or None,
+         "num_floors": int or None, "mtime": folder mtime when scanned}
+    The index is built with a single scan of the split folders and persisted
+    next to the datasets (see default_index_path), so resolving a scene never
+    lists folders. An entry is rescanned when its folder mtime changed, e.g.
+    after files were added to the scene folder.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        scenes: Dict[str, Dict[str, Dict[str, Any]]],
+        index_path: Optional[str] = None,
+        scanned_at: float = 0.0,
+    ):
+        self.root = root
+        self.scenes = scenes
+        self.index_path = index_path or default_index_path(root)
+        self.scanned_at = scanned_at
+
+    @classmethod
+    def build(cls, root: str, index_path: Optional[str] = None) -> "SceneCatalog":
+        scanned_at = time.time()
+        scenes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for split_entry in os.scandir(root):
+            if not split_entry.is_dir():
+                continue
+            split = split_entry.name
+            for folder in os.scandir(split_entry.path):
+                if not folder.is_dir() or "-" not in folder.name:
+                    continue
+                name = folder.name.split("-", 1)[1]
+                scenes.setdefault(split, {})[name] = scan_scene_folder(split, folder.path)
+        return cls(root, scenes, index_path=index_path, scanned_at=scanned_at)
+
+    @classmethod
+    def load(cls, root: str, index_path: Optional[str] = None) -> "SceneCatalog":
+        """Loads the persisted index, building and saving it if missing."""
+        index_path = index_path or default_index_path(root)
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                return cls(root, json.load(f), index_path=index_path, scanned_at=os.path.getmtime(index_path))
+        catalog = cls.build(root, index_path=index_path)
+        catalog.save()
+        return catalog
+
+    def save(self) -> None:
+        # Unique temporary file in the same folder, concurrent writers never share it
+        index_dir = os.path.dirname(os.path.abspath(self.index_path))
+        os.makedirs(index_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=index_dir, suffix=".tmp", delete=False) as f:
+            json.dump(self.scenes, f, indent=1, sort_keys=True)
+        try:
+            # NamedTemporaryFile is private to the user, the index is not
+            os.chmod(f.name, 0o644)
+            os.replace(f.name, self.index_path)
+        except OSError:
+            os.remove(f.name)
+            raise
+
+    def get(self, split: str, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Entry of a scene, rescanned if its folder changed since it was indexed.
+        A missing scene triggers a rescan only if the split folder changed
+        since the last scan (e.g. newly downloaded scenes).
+        """
+        entry = self.scenes.get(split, {}).get(name)
+        if entry is not None:
+            folder_path = os.path.join(self.root, split, entry["folder"])
+            if not os.path.isdir(folder_path):
+                return None
+            if os.path.getmtime(folder_path) != entry.get("mtime"):
+                # Files added or removed since the scan, keep the floor count
+                num_floors = entry.get("num_floors")
+                entry = scan_scene_folder(split, folder_path)
+                entry["num_floors"] = num_floors
+                self.scenes[split][name] = entry
+                self.save()
+            return entry
+
+        split_dir = os.path.join(self.root, split)
+        if os.path.isdir(split_dir) and os.path.getmtime(split_dir) > self.scanned_at:
+            rebuilt = SceneCatalog.build(self.root, index_path=self.index_path)
+            # Keep the floor counts already recorded
+            for s, names in self.scenes.items():
+                for n, old in names.items():
+                    if n in rebuilt.scenes.get(s, {}):
+                        rebuilt.scenes[s][n]["num_floors"] = old.get("num_floors")
+            self.scenes = rebuilt.scenes
+            self.scanned_at = rebuilt.scanned_at
+            self.save()
+            entry = self.scenes.get(split, {}).get(name)
+        return entry
+
+    def path(self, split: str, name: str, kind: str = "glb") -> Optional[str]:
+        """Path of one of the scene files, relative to the root."""
+        entry = self.get(split, name)
+        return entry[kind] if entry else None
+
+    def set_num_floors(self, split: str, name: str, num_floors: int) -> None:
+        entry = self.get(split, name)
+        if entry is not None and entry.get("num_floors") != num_floors:
+            entry["num_floors"] = int(num_floors)
+            self.save()
+
+
+def get_catalog(root: str = DEFAULT_SCENES_ROOT) -> SceneCatalog:
+    """Returns the catalog of `root`, loading (or building) it on first use."""
+    key = os.path.abspath(root)
+    if key not in _CATALOGS:
+        _CATALOGS[key] = SceneCatalog.load(root)
+    return _CATALOGS[key]
@@ -1,9 +1,29 @@
+from __future__ import annotations
+
 import numpy as np
-import habitat_sim
 from typing import List, Dict, Any, Tuple
+from collections import OrderedDict
 import os
 import gzip
 import json
+import pickle
+import hashlib
+
+try:
+    import habitat_sim
+except ImportError:  # sampling still works on a non-habitat backend
+    habitat_sim = None
+
+from habitat_tf.backends import as_backend
+from habitat_tf.viewpoint_store import ViewpointStore
+
+# Parsed GOAT lookups per (base_path, scene, splits), shared by all batches of a scene
+_SCENE_DATA: "OrderedDict[Tuple[str, str, Tuple[str, ...]], Dict[str, Any]]" = OrderedDict()
+MAX_CACHED_SCENES = 8
+
+# Visible view points found per (scene, object position, radius), reused across calls
+_VISIBLE_VIEWPOINTS: "OrderedDict[Tuple[str, bytes, float], np.ndarray]" = OrderedDict()
+MAX_CACHED_OBJECTS = 4096
 
 def load_merged_scene_data(
     base_path: str,
@@ -63,6 +83,59 @@ def build_lookups(
 
     return view_point_lookup, start_lookup
 
+def load_scene_lookups(
+    base_path: str,
+    scene_id: str,
+    splits: List[str] = ("val_seen", "val_seen_synonyms", "val_unseen"),
+    cache_dir: str = None,
+) -> Dict[str, Any]:
+    """
+    Cached load_merged_scene_data + build_lookups: each scene's GOAT files are
+    parsed once per run and kept in an in-memory LRU. With `cache_dir` the
+    lookups are also snapshotted with pickle and reused by later runs, as long
+    as the GOAT files are not newer than the snapshot.
+
+    :param base_path: Base path of the GOAT dataset.
+    :param scene_id: Scene id or path, only its file name is used.
+    :param splits: GOAT splits to merge, later splits override earlier ones.
+    :param cache_dir: Optional directory for the on-disk snapshots.
+    :return: {"view_point_lookup", "start_lookup", "viewpoint_store"}, shared
+        between callers and not to be modified.
+    """
+    scene_name = os.path.basename(scene_id.split('/')[-1].split('.')[0])
+    key = (os.path.abspath(base_path), scene_name, tuple(splits))
+    if key in _SCENE_DATA:
+        _SCENE_DATA.move_to_end(key)
+        return _SCENE_DATA[key]
+
+    sources = [os.path.join(base_path, split, "content", f"{scene_name}.json.gz") for split in splits]
+    sources = [path for path in sources if os.path.exists(path)]
+
+    lookups = None
+    snapshot_path = None
+    if cache_dir:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+        snapshot_path = os.path.join(cache_dir, f"{scene_name}_{digest}.pkl")
+        newest_source = max((os.path.getmtime(path) for path in sources), default=0.0)
+        if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) >= newest_source:
+            with open(snapshot_path, "rb") as f:
+                lookups = pickle.load(f)
+
+    if lookups is None:
+        merged = load_merged_scene_data(base_path=base_path, scene_id=scene_id, splits=splits)
+        view_point_lookup, start_lookup = build_lookups(merged=merged, use_view_points=True)
+        lookups = {"view_point_lookup": view_point_lookup, "start_lookup": start_lookup}
+        if snapshot_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(snapshot_path, "wb") as f:
+                pickle.dump(lookups, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    lookups["viewpoint_store"] = ViewpointStore(lookups["view_point_lookup"])
+    _SCENE_DATA[key] = lookups
+    if len(_SCENE_DATA) > MAX_CACHED_SCENES:
+        _SCENE_DATA.popitem(last=False)
+    return lookups
+
 def random_yaw_rotation() -> list:
     """
     Generate a random rotation quaternion representing a yaw rotation around the Y-axis.
@@ -85,6 +158,37 @@ def euclidean_distance(point_a: np.ndarray, point_b: np.ndarray, dims: tuple = (
     diff = point_a[list(dims)] - point_b[list(dims)]
     return float(np.linalg.norm(diff))
 
+def geodesic_distance(
+    sim: habitat_sim.Simulator,
+    start: np.ndarray,
+    goals: np.ndarray,
+    cache=None,
+) -> float:
+    """
+    Geodesic distance from `start` to the closest of `goals` with a single
+    pathfinder query (MultiGoalShortestPath when there is more than one goal).
+    
+    :param sim: Initialized Habitat Simulator instance or a PathfinderBackend.
+    :param start: Start position [x, y, z].
+    :param goals: Goal positions, shape (N, 3).
+    :param cache: Optional SceneGeodesicCache consulted before the pathfinder.
+    :return: Geodesic distance, inf if no goal is reachable.
+    """
+    goals = np.asarray(goals, dtype=float).reshape(-1, 3)
+    if len(goals) == 0:
+        return float("inf")
+
+    if cache is not None:
+        cached = cache.get(start, goals)
+        if cached is not None:
+            return cached
+
+    distance = as_backend(sim).geodesic_distance(start, goals)
+
+    if cache is not None:
+        cache.put(start, goals, distance)
+    return distance
+
 def make_simple_cfg(
     settings: dict,
     use_equirectangular: bool = False
@@ -123,6 +227,29 @@ def make_simple_cfg(
 
     return habitat_sim.Configuration(sim_config, [agent_config])
 
+def make_nav_cfg(settings: dict) -> habitat_sim.Configuration:
+    """Create a headless Habitat configuration for navigation queries only.
+
+    The scene is loaded for its navmesh and collision geometry (used by
+    cast_ray), without renderer, textures, semantic mesh or sensors.
+
+    Args:
+        settings: Configuration parameters, only "scene" is used.
+
+    Returns:
+        Habitat simulator configuration object
+    """
+    sim_config = habitat_sim.SimulatorConfiguration()
+    sim_config.scene_id = settings["scene"]
+    sim_config.create_renderer = False
+    sim_config.requires_textures = False
+    sim_config.load_semantic_mesh = False
+
+    agent_config = habitat_sim.agent.AgentConfiguration()
+    agent_config.sensor_specifications = []
+
+    return habitat_sim.Configuration(sim_config, [agent_config])
+
 def sample_additional_viewpoints(
     sim: habitat_sim.Simulator,
     object_pos: list,
@@ -135,6 +262,7 @@ def sample_additional_viewpoints(
     Samples additional navigable viewpoints near an object's position,
     with optional visibility checks and orientation.
     """
+    backend = as_backend(sim)
     new_views = []
     object_pos_np = np.array(object_pos, dtype=float)
     object_center_np = object_pos_np + np.array([0, 0.1, 0], dtype=float)
@@ -143,7 +271,7 @@ def sample_additional_viewpoints(
         # Use a placeholder for the best point found in the tries
         best_vp = None
         for i in range(max_tries):
-            vp_nav = sim.pathfinder.get_random_navigable_point_near(
+            vp_nav = backend.get_random_navigable_point_near(
                 object_pos, radius=radius, max_tries=20
             )
             if vp_nav is None or np.isinf(vp_nav).any() or np.isnan(vp_nav).any():
@@ -156,18 +284,10 @@ def sample_additional_viewpoints(
                 break
 
             dist_to_obj = np.linalg.norm(object_center_np - vp)
-    
-            ray = habitat_sim.geo.Ray(vp, object_center_np - vp)
-            
-            # --- CORRECTED LOGIC FOR RaycastResults ---
-            raycast_results = sim.cast_ray(ray)
-            if (not raycast_results.hits) or (raycast_results.hits[0].ray_distance >= dist_to_obj - 0.2):
-                best_vp = vp
-                break
-            
+
             # A good viewpoint is one where the ray either hits nothing
-            # (the hits list is empty) or the first thing it hits is the object itself.
-            if not raycast_results.hits or raycast_results.hits[0].hit_distance >= dist_to_obj - 0.2:
+            # or the first thing it hits is the object itself.
+            if backend.cast_ray(vp, object_center_np) >= dist_to_obj - 0.2:
                 best_vp = vp # Found a visible point
                 break
         
@@ -181,6 +301,71 @@ def sample_additional_viewpoints(
             
     return new_views
 
+def sample_additional_viewpoints_batched(
+    sim: habitat_sim.Simulator,
+    object_pos: list,
+    count: int = 10,
+    radius: float = 1.5,
+    max_tries: int = 200,
+    visibility_check: bool = True,
+    block_size: int = 64,
+) -> list:
+    """
+    Batched sample_additional_viewpoints: candidates are drawn in blocks of
+    `block_size`, invalid ones are dropped with a single mask and the rest
+    are raycast together, until `count` visible view points are found or the
+    `count * max_tries` candidate budget is spent. Visible points are cached
+    per object, so repeated calls for the same object cost no query.
+    If too few visible points exist, non-visible candidates fill the
+    remaining slots, like the fallback of the sequential version.
+    """
+    backend = as_backend(sim)
+    object_pos_np = np.array(object_pos, dtype=float)
+    object_center_np = object_pos_np + np.array([0, 0.1, 0], dtype=float)
+
+    key = (str(getattr(backend, "scene_id", "")), np.round(object_pos_np, 2).tobytes(), float(radius))
+    visible = _VISIBLE_VIEWPOINTS.get(key, np.zeros((0, 3)))
+    fallback = np.zeros((0, 3))
+
+    budget = count * max_tries
+    while len(visible) < count and budget > 0:
+        # Blocks sized to the missing points, ~half the candidates are usually visible
+        n = min(block_size, budget, max(2 * (count - len(visible)), 8))
+        budget -= n
+
+        # 1) drop failed samples and points outside the radius
+        block = backend.sample_points_near(object_pos_np, radius, n)
+        valid = np.isfinite(block).all(axis=1)
+        valid[valid] &= np.linalg.norm(block[valid] - object_pos_np, axis=1) <= radius + 1e-3
+        block = block[valid]
+        if len(block) == 0:
+            continue
+        if not visibility_check:
+            visible = np.concatenate([visible, block])
+            continue
+
+        # 2) visible if the first hit is (close to) the object itself
+        dist_to_obj = np.linalg.norm(object_center_np - block, axis=1)
+        hits = backend.cast_rays(block, np.broadcast_to(object_center_np, block.shape))
+        is_visible = hits >= dist_to_obj - 0.2
+        visible = np.concatenate([visible, block[is_visible]])
+        fallback = np.concatenate([fallback, block[~is_visible]])[-count:]
+
+    if visibility_check and len(visible):
+        _VISIBLE_VIEWPOINTS[key] = visible
+        _VISIBLE_VIEWPOINTS.move_to_end(key)
+        if len(_VISIBLE_VIEWPOINTS) > MAX_CACHED_OBJECTS:
+            _VISIBLE_VIEWPOINTS.popitem(last=False)
+
+    if len(visible) > count:
+        visible = visible[np.random.choice(len(visible), size=count, replace=False)]
+    points = np.concatenate([visible, fallback[:count - len(visible)]])
+
+    return [
+        {"agent_state": {"position": list(vp), "rotation": get_rotation_to_point(vp, object_pos_np)}}
+        for vp in points
+    ]
+
 # Helper function (if you haven't added it yet)
 def get_rotation_to_point(source_pos: np.ndarray, target_pos: np.ndarray) -> list:
     direction = target_pos - source_pos
@@ -215,7 +400,20 @@ def get_rotation_to_point(
     half_yaw = yaw / 2.0
     return [0.0, np.sin(half_yaw), 0.0, np.cos(half_yaw)]
 
-def all_goals(ep):
+def all_goals(ep, store=None):
     """Yield each possible goal position in this episode."""
-    for vp in ep["view_points"]:
-        yield np.array(vp["agent_state"]["position"], dtype=float)
\ No newline at end of file
+    yield from goal_array(ep, store)
+
+def goal_array(ep, store=None) -> np.ndarray:
+    """
+    Return all the view_point positions of this episode as an (N, 3) array.
+    With a ViewpointStore the positions are sliced from its columns, unless
+    the episode's view_points were augmented after the store was built.
+    """
+    if store is not None and ep.get("object_id") in store:
+        positions = store.positions_of(ep["object_id"])
+        if len(positions) == len(ep["view_points"]):
+            return positions.astype(float)
+    return np.array(
+        [vp["agent_state"]["position"] for vp in ep["view_points"]], dtype=float
+    ).reshape(-1, 3)
@@ -0,0 +1,77 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+
+class ViewpointStore:
+    """
+    Columnar view of the view_points of a scene: positions (N, 3) as a float32
+    array grouped by object, so per-object lookups are array slices instead of
+    lists of dicts. The original dicts are kept by reference and returned
+    unchanged where episodes need them.
+    """
+
+    def __init__(self, view_point_lookup: Dict[Any, List[Dict[str, Any]]]):
+        self.object_ids = list(view_point_lookup.keys())
+        self._object_index = {obj_id: k for k, obj_id in enumerate(self.object_ids)}
+        self._view_points = [view_point_lookup[obj_id] or [] for obj_id in self.object_ids]
+
+        # View points of object k are the rows offsets[k]:offsets[k + 1]
+        counts = np.array([len(vps) for vps in self._view_points], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        flat = [vp for vps in self._view_points for vp in vps]
+
+        self.positions = np.array(
+            [vp["agent_state"]["position"] for vp in flat], dtype=np.float32
+        ).reshape(-1, 3)
+
+    @classmethod
+    def from_episodes(cls, episodes: List[Dict[str, Any]]) -> "ViewpointStore":
+        """
+        Store over the view_points attached to episodes, including merged
+        multi-instance episodes. The first episode seen for an object wins.
+        """
+        lookup: Dict[Any, List[Dict[str, Any]]] = {}
+        for ep in episodes:
+            object_ids = ep["object_id"]
+            view_points_list = ep.get("view_points", [])
+            if not isinstance(object_ids, list):
+                object_ids = [object_ids]
+                view_points_list = [view_points_list]
+            for i, obj_id in enumerate(object_ids):
+                if obj_id not in lookup:
+                    lookup[obj_id] = view_points_list[i] if i < len(view_points_list) else []
+        return cls(lookup)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, obj_id) -> bool:
+        try:
+            return obj_id in self._object_index
+        except TypeError:
+            # Merged episodes carry a list of object ids
+            return False
+
+    def rows(self, obj_id) -> slice:
+        k = self._object_index[obj_id]
+        return slice(int(self.offsets[k]), int(self.offsets[k + 1]))
+
+    def positions_of(self, obj_id) -> np.ndarray:
+        """View_point positions of an object, shape (n, 3); empty for unknown objects."""
+        if obj_id not in self:
+            return self.positions[:0]
+        return self.positions[self.rows(obj_id)]
+
+    def view_points(self, obj_id) -> List[Dict[str, Any]]:
+        """The original view_point dicts of an object (not a copy)."""
+        if obj_id not in self:
+            return []
+        return self._view_points[self._object_index[obj_id]]
+
+    def closest(self, obj_id, point) -> Optional[List[float]]:
+        """Position of the object's view_point closest (in 3D) to `point`, None if it has none."""
+        positions = self.positions_of(obj_id)
+        if len(positions) == 0:
+            return None
+        i = int(np.argmin(np.linalg.norm(positions - np.asarray(point, dtype=np.float32), axis=1)))
+        return self.view_points(obj_id)[i]["agent_state"]["position"]
@@ -5,6 +5,7 @@ import random
 from collections import Counter
 
 from personalized.prompts.generate_prompt import generate_prompt, generate_prompt_from_graph
+from personalized.utils.graph_utils import ownership_hash
 
 DEBUG = False
 
@@ -18,6 +19,9 @@ OBJECTS_LIMIT = {
     "kitchen_cabinet": 2, # val unseen
 }
 
+# Max resampling attempts when an ownership graph was already sent for the same floor
+MAX_GRAPH_RESAMPLES = 10
+
 def main(args):
     
     """
@@ -56,6 +60,8 @@ def create_batched_json(split_path, model, level, max_folders=None):
     """
     batch_api = []
     g_metrics = {}  # To store graph metrics for each scene
+    n_avoided_duplicates = 0  # Requests whose duplicate ownership graph was replaced by a resample
+    n_dropped_summaries = 0  # Summaries skipped because every resample was a duplicate
     
     # Loop through each scene in the split
     for folder_id, folder_scene in enumerate(os.listdir(split_path)):
@@ -103,6 +109,9 @@ def create_batched_json(split_path, model, level, max_folders=None):
                 unique_id_base = json_path.split("/")[-1].split(".")[0]
                 for floor, items in floor_groups.items():
                     
+                    # Canonical hashes of the ownership graphs already requested for this floor
+                    seen_graphs = set()
+                    
                     # Variable chunk based on the number of items
                     chunk_size = get_chunk_size(num_objects=len(items), 
                                                 level=args.level,
@@ -144,10 +153,26 @@ def create_batched_json(split_path, model, level, max_folders=None):
                         else:                           
                             prompt = []
                             for summary_idx in range(n_summaries):
-                                g_infos = generate_prompt_from_graph(
-                                    chunk,
-                                    LEVEL=level,
-                                )
+                                # Resample graphs already sent for this floor
+                                for n_resamples in range(MAX_GRAPH_RESAMPLES):
+                                    g_infos = generate_prompt_from_graph(
+                                        chunk,
+                                        LEVEL=level,
+                                    )
+                                    g_hash = ownership_hash(g_infos["ownership"])
+                                    if g_hash not in seen_graphs:
+                                        break
+                                
+                                # Every resample was a duplicate, do not pay for the same request twice
+                                if g_hash in seen_graphs:
+                                    n_dropped_summaries += 1
+                                    print(f"Dropped summary {summary_idx} of {unique_id_base}_floor_{floor}: "
+                                          f"{MAX_GRAPH_RESAMPLES} duplicate graphs in a row")
+                                    continue
+                                if n_resamples > 0:
+                                    n_avoided_duplicates += 1
+                                seen_graphs.add(g_hash)
+                                
                                 unique_id = f"{unique_id_base}_floor_{floor}_split_{count}"
                                 batch_api.append(
                                     generate_single_batch(unique_id, model, g_infos["prompt"])
@@ -163,6 +188,8 @@ def create_batched_json(split_path, model, level, max_folders=None):
         
     # Print Graph metrics
     if args.use_graph_strategy:
+        print(f"Level: {args.level} - Avoided duplicate graph requests: {n_avoided_duplicates}")
+        print(f"Level: {args.level} - Dropped summaries (only duplicate graphs): {n_dropped_summaries}")
         print(f"Level: {args.level} - Aggregated Graph Metrics:")
         aggregated_metrics = aggregate_graph_metrics(g_metrics)
         for key, value in aggregated_metrics.items():
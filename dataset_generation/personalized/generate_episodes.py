@@ -2,7 +2,10 @@ from personalized.utils.utils import (
     get_scene_path, write_retrieval_episodes, groupby_write_active_episode, groupby_write_passive_episode
 )
 from personalized.utils.names import NAMES
-from habitat_tf.nav_episode import prepare_episode_data, initialize_simulator
+from habitat_tf.nav_episode import prepare_episode_data, initialize_simulator, sampling_report
+from habitat_tf.geodesic_cache import GeodesicCache
+from habitat_tf.viewpoint_store import ViewpointStore
+from habitat_tf.floor_maps import build_floor_maps, scene_floor_heights, floor_index
 import argparse
 import os 
 import json
@@ -43,6 +46,9 @@ def main(args):
     # Response before generating episodes
     response_file = []
     all_active_nav_episodes = []
+    
+    # Persistent geodesic cache shared across runs
+    geodesic_cache = GeodesicCache(args.geodesic_cache_path) if args.geodesic_cache_path else None
         
     for num_scenes, scene_name in enumerate(os.listdir(os.path.join(args.base_path, args.split))):
         scene_path = os.path.join(args.base_path, args.split, scene_name)
@@ -64,8 +70,17 @@ def main(args):
                     except: pass
                     sim = initialize_simulator(
                         scene_id=scene_name,
+                        nav_only=args.nav_only,
+                        needs_raycasts=True,
                     )
             
+            # Top-down floor maps, rasterized once per scene and referenced by key
+            floor_map_keys = {}
+            if args.add_nav_data and args.floor_maps_dir:
+                floor_map_keys = build_floor_maps(
+                    sim, scene_name, scene_floor_heights(sim, scene_name, args.floor_model_dir), maps_dir=args.floor_maps_dir
+                )
+            
             # Loop over all the JSON files in the scene folder
             for json_file in os.listdir(scene_path):
                 json_path = os.path.join(scene_path, json_file)
@@ -155,7 +170,7 @@ def main(args):
                                 split=args.split,
                                 scene_id=scene_name,
                                 object_var=process_response,
-                                feature_map=None
+                                feature_map=floor_map_keys.get(floor_index(floor))
                             )
                             for ep in single_floor_episodes:
                                 print(f"Owner: {ep['owner']}, Object Category: {ep['object_category']}, Object ID: {ep['object_id']}, Position: {ep['object_pos']}")
@@ -169,6 +184,15 @@ def main(args):
                                     episodes=single_floor_episodes,
                                     level=args.data_split,
                                     use_view_points=True,
+                                    use_multigoal=args.use_multigoal_sampling,
+                                    use_point_pool=args.use_point_pool,
+                                    point_pool_cache_dir=args.point_pool_cache_dir,
+                                    use_distance_field=args.use_distance_field,
+                                    geodesic_cache=geodesic_cache,
+                                    scene_data_cache_dir=args.scene_data_cache_dir,
+                                    use_annulus=args.use_annulus_sampling,
+                                    validate_starts=args.validate_goat_starts,
+                                    use_islands=args.use_islands,
                                 )
                                 
                             # Check to allow multiple instances of the same object owned by same person 
@@ -265,6 +289,16 @@ def main(args):
     ) / len(all_episodes) if all_episodes else 0
     print("Average Description Length:", avg_description_length)
     
+    # Start sampling statistics
+    for line in sampling_report():
+        print("Start Sampling:", line)
+    
+    # Geodesic cache statistics
+    if geodesic_cache is not None:
+        geodesic_cache.close()
+        cache_stats = geodesic_cache.stats()
+        print(f"Geodesic Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, hit rate {cache_stats['hit_rate']:.2%}")
+    
     
 
 def overwrite_placeholders_names(episodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -563,7 +597,7 @@ def generate_episodes_from_batch(split, scene_id, object_var, feature_map=None):
         split (str): The split of the episode (e.g., "val_seen", "val_unseen", "val_seen_syonyms").
         scene_id (str): The unique ID of the scene.
         object_var (dict): A dictionary containing the object category, object ID, person, and floor.
-        feature_map (np.array): The feature map of the scene.
+        feature_map (str): Key of the floor map of the scene, see habitat_tf.floor_maps.
 
     Returns:
         dict: A dictionary containing the object name, description, object position, and feature map.
@@ -622,7 +656,7 @@ def generate_episodes_from_batch(split, scene_id, object_var, feature_map=None):
                 # Scene summary and mapping
                 "summary": response["summary"], # str
                 "extracted_summary": extracted_summaries, # lst of str
-                "feature_map": feature_map, # For now, we will leave this as None
+                "feature_map": feature_map, # str floor map key or None
                 
                 # Query
                 "query": query, # str
@@ -660,8 +694,12 @@ def extract_object_id_int(object_id_str: str) -> int:
     
 def generate_objectgoal_json(episodes: List[Dict[str, Any]]) -> Dict[str, Any]:
     goals_by_category = defaultdict(list)
+    goal_ids_by_category = defaultdict(set)
     habitat_episodes = []
 
+    # View points per object, shared by every episode that targets it
+    viewpoint_store = ViewpointStore.from_episodes(episodes)
+
     for ep in episodes:
         scene_path = ep["scene_id"]
         scene_name = os.path.basename(scene_path)
@@ -669,7 +707,6 @@ def generate_objectgoal_json(episodes: List[Dict[str, Any]]) -> Dict[str, Any]:
         object_ids = ep["object_id"]
         object_positions = ep["object_pos"]
         room_id = ep.get("room_id", None)
-        view_points_list = ep.get("view_points", [])
         
         # Add other keys
         ep["additional_obj_config_paths"] = []
@@ -681,15 +718,14 @@ def generate_objectgoal_json(episodes: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not isinstance(object_ids, list):
             object_ids = [object_ids]
             object_positions = [object_positions]
-            view_points_list = [view_points_list]
 
         goal_key = f"{scene_name}_{object_cat}"
 
-        for i, (obj_id_str, obj_pos) in enumerate(zip(object_ids, object_positions)):
+        for obj_id_str, obj_pos in zip(object_ids, object_positions):
             obj_id_int = extract_object_id_int(obj_id_str)
 
-            existing_ids = {g["object_id"] for g in goals_by_category[goal_key]}
-            if obj_id_int not in existing_ids:
+            if obj_id_int not in goal_ids_by_category[goal_key]:
+                goal_ids_by_category[goal_key].add(obj_id_int)
                 goal_obj = {
                     "position": obj_pos,
                     "radius": None,
@@ -700,7 +736,7 @@ def generate_objectgoal_json(episodes: List[Dict[str, Any]]) -> Dict[str, Any]:
                     "floor_id": ep.get("floor_id", None),
                     "room_id": ep.get("room_id", None),
                     "room_name": None,
-                    "view_points": view_points_list[i] if i < len(view_points_list) else [],
+                    "view_points": viewpoint_store.view_points(obj_id_str),
                 }
                 goals_by_category[goal_key].append(goal_obj)
 
@@ -713,7 +749,8 @@ def generate_objectgoal_json(episodes: List[Dict[str, Any]]) -> Dict[str, Any]:
         ep_dict["info"] = {
             "geodesic_distance": ep.get("geodesic_distance", -1),
             "euclidean_distance": ep.get("euclidean_distance", -1),
-            "closest_goal_object_id": closest_goal_object_id
+            "closest_goal_object_id": closest_goal_object_id,
+            "feature_map": ep.get("feature_map"),
         }
         
         # Convert episode_id to str
@@ -746,6 +783,18 @@ if __name__ == "__main__":
     parser.add_argument("--add_nav_data", type=bool, default=True, help="Whether to add navigation data to the episodes")
     parser.add_argument("--use_graph_generator", type=bool, default=True, help="Whether to use episodes generated from graphs")
     parser.add_argument("--generate_active_data", type=bool, default=True, help="Whether to generate active learning data")
+    parser.add_argument("--use_multigoal_sampling", action="store_true", default=False, help="Evaluate start candidates against all view_points in one path query")
+    parser.add_argument("--use_point_pool", action="store_true", default=False, help="Draw start candidates from a per-scene pool of navigable points")
+    parser.add_argument("--point_pool_cache_dir", type=str, default=None, help="Optional directory to cache the per-scene point pools")
+    parser.add_argument("--use_annulus_sampling", action="store_true", default=False, help="Draw start candidates from the annulus around the goals matching the geodesic window")
+    parser.add_argument("--validate_goat_starts", action="store_true", default=False, help="Keep GOAT start positions whose geodesic distance is already in range")
+    parser.add_argument("--use_islands", action="store_true", default=False, help="Draw start candidates only on the navmesh islands of the goals")
+    parser.add_argument("--use_distance_field", action="store_true", default=False, help="Pick starts from cached per-goal geodesic distance fields over the point pool; the point graph costs one try_step per candidate edge, once per scene, so this pays off with many episodes per scene")
+    parser.add_argument("--nav_only", action="store_true", default=False, help="Load scenes without renderer and sensors, only for pathfinding and raycasts")
+    parser.add_argument("--scene_data_cache_dir", type=str, default=None, help="Optional directory to snapshot the parsed GOAT data of each scene")
+    parser.add_argument("--floor_maps_dir", type=str, default=None, help="Optional directory to store per-floor top-down maps referenced by the episodes")
+    parser.add_argument("--floor_model_dir", type=str, default=None, help="Optional directory to cache the floor heights of each scene")
+    parser.add_argument("--geodesic_cache_path", type=str, default=None, help="Optional SQLite file caching geodesic queries across runs")
     
     args = parser.parse_args()
     main(args)
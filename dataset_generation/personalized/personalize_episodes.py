@@ -1,11 +1,16 @@
 # Define helper functions
 import re
+import time
 import random
 import copy
-from typing import Any, Dict, List, Set
+from functools import lru_cache
+from typing import Any, Dict, List, Set, Tuple
 
 OVERLAP = False
 
+# Compiled once, used by the batched personalizer
+PLACEHOLDER_REGEX = re.compile(r"<person(\d+)>")
+
 # Extract all <personX> placeholders from nested structures
 def extract_placeholders(item: Any, found: Set[str]) -> None:
     if isinstance(item, str):
@@ -29,26 +34,12 @@ def replace_in_item(item: Any, mapping: Dict[str, str]) -> Any:
         return {k: replace_in_item(v, mapping) for k, v in item.items()}
     return item
 
-# Replace placeholders using a given overlap probability
-def replace_person_placeholders(
-    episode: Dict[str, Any],
-    name_list: List[str] = None,
+# Draw a name for each <personX> number, allowing overlaps after the third person
+def draw_name_mapping(
+    person_numbers: List[int],
+    name_list: List[str],
     overlap_probability: float = 0.0
-) -> Dict[str, Any]:
-    if name_list is None:
-        name_list = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Helen", "Ivy", "Jack"]
-
-    new_episode = copy.deepcopy(episode)
-    found_placeholders: Set[str] = set()
-    extract_placeholders(new_episode, found_placeholders)
-
-    person_numbers = []
-    for ph in found_placeholders:
-        m = re.search(r"<person(\d+)>", ph)
-        if m:
-            person_numbers.append(int(m.group(1)))
-    person_numbers = sorted(set(person_numbers))
-
+) -> Dict[str, str]:
     mapping = {}
     available_names = name_list.copy()
 
@@ -71,13 +62,34 @@ def replace_person_placeholders(
             else:
                 mapping[key] = random.choice(list(mapping.values()))
 
-    return replace_in_item(new_episode, mapping)
+    return mapping
 
-# Main function to apply replacement using dynamic overlap probability
-def replace_with_dynamic_overlap(
+# Replace placeholders using a given overlap probability
+def replace_person_placeholders(
     episode: Dict[str, Any],
-    name_list: List[str] = None
+    name_list: List[str] = None,
+    overlap_probability: float = 0.0
 ) -> Dict[str, Any]:
+    if name_list is None:
+        name_list = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Helen", "Ivy", "Jack"]
+
+    new_episode = copy.deepcopy(episode)
+    found_placeholders: Set[str] = set()
+    extract_placeholders(new_episode, found_placeholders)
+
+    person_numbers = []
+    for ph in found_placeholders:
+        m = re.search(r"<person(\d+)>", ph)
+        if m:
+            person_numbers.append(int(m.group(1)))
+    person_numbers = sorted(set(person_numbers))
+
+    mapping = draw_name_mapping(person_numbers, name_list, overlap_probability)
+
+    return replace_in_item(new_episode, mapping)
+
+# Overlap probability as a function of the number of people in the episode
+def get_overlap_probability(person_count: int) -> float:
     # Mapping from number of people -> overlap probability
     if OVERLAP:
         overlap_prob_by_people = {
@@ -90,6 +102,14 @@ def replace_with_dynamic_overlap(
     else:  
         overlap_prob_by_people = { k: 0.0 for k in range(2, 7) }
 
+    # Lookup the overlap probability (default to 0.2 if more than 6 people)
+    return overlap_prob_by_people.get(person_count, 0.2)
+
+# Main function to apply replacement using dynamic overlap probability
+def replace_with_dynamic_overlap(
+    episode: Dict[str, Any],
+    name_list: List[str] = None
+) -> Dict[str, Any]:
     # Count unique <personX> in the episode
     found_placeholders: Set[str] = set()
     extract_placeholders(episode, found_placeholders)
@@ -99,13 +119,103 @@ def replace_with_dynamic_overlap(
         for p in found_placeholders if re.search(r"<person(\d+)>", p)
     ))
 
-    # Lookup the overlap probability (default to 0.2 if more than 6 people)
-    overlap_probability = overlap_prob_by_people.get(person_count, 0.2)
+    overlap_probability = get_overlap_probability(person_count)
 
     # Apply the replacement
     return replace_person_placeholders(episode, name_list, overlap_probability)
 
 
+# Collect the <personX> numbers of a nested structure in a single traversal
+def collect_person_numbers(item: Any) -> Set[int]:
+    found: Set[int] = set()
+    stack = [item]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            if "<person" in node:
+                found.update(int(n) for n in PLACEHOLDER_REGEX.findall(node))
+        elif isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+    return found
+
+# One alternation regex per mapping, longest placeholders first (<person10> before <person1>)
+@lru_cache(maxsize=1024)
+def compile_mapping(placeholders: Tuple[str, ...]) -> "re.Pattern":
+    ordered = sorted(placeholders, key=len, reverse=True)
+    return re.compile("|".join(re.escape(ph) for ph in ordered))
+
+# Rewrite string leaves in a single pass. Untouched sub-structures are
+# returned as-is (shared with the input) instead of being copied.
+def substitute_placeholders(item: Any, pattern: "re.Pattern", mapping: Dict[str, str]) -> Any:
+    if isinstance(item, str):
+        if "<person" not in item:
+            return item
+        return pattern.sub(lambda m: mapping[m.group(0)], item)
+    elif isinstance(item, list):
+        new_items = [substitute_placeholders(elem, pattern, mapping) for elem in item]
+        if all(new is old for new, old in zip(new_items, item)):
+            return item
+        return new_items
+    elif isinstance(item, dict):
+        new_dict = {k: substitute_placeholders(v, pattern, mapping) for k, v in item.items()}
+        if all(new_dict[k] is v for k, v in item.items()):
+            return item
+        return new_dict
+    return item
+
+# Batched personalizer: same name drawing as replace_with_dynamic_overlap,
+# applied to a list of episodes with one compiled regex per mapping
+def personalize_episodes(
+    episodes: List[Dict[str, Any]],
+    name_list: List[str] = None
+) -> List[Dict[str, Any]]:
+    if name_list is None:
+        name_list = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Helen", "Ivy", "Jack"]
+
+    personalized = []
+    for episode in episodes:
+        person_numbers = sorted(collect_person_numbers(episode))
+        if not person_numbers:
+            personalized.append(episode)
+            continue
+
+        mapping = draw_name_mapping(
+            person_numbers, name_list, get_overlap_probability(len(person_numbers))
+        )
+        pattern = compile_mapping(tuple(sorted(mapping)))
+        personalized.append(substitute_placeholders(episode, pattern, mapping))
+    return personalized
+
+# Compare the batched personalizer with replace_with_dynamic_overlap
+def benchmark_personalizer(n_episodes: int = 5000, n_people: int = 12) -> Dict[str, float]:
+    summary = " ".join(f"<person{i}> owns object_{i}." for i in range(1, n_people + 1))
+    episode = {
+        "scene_id": "scene_01",
+        "object_category": "bed",
+        "object_pos": [1, 2, 3],
+        "view_points": [{"agent_state": {"position": [1.0, 0.0, 2.0], "rotation": [0, 0, 0, 1]}}] * 20,
+        "owner": "<person10>",
+        "summary": summary,
+        "extracted_summary": [f"<person{i}> owns object_{i}" for i in range(1, n_people + 1)],
+        "query": ["Find <person10>'s bed", "Where is <person10>'s bed?"],
+    }
+    episodes = [episode] * n_episodes
+    names = [f"Name{i}" for i in range(2 * n_people)]
+
+    timings = {}
+    start = time.perf_counter()
+    for ep in episodes:
+        replace_with_dynamic_overlap(ep, names)
+    timings["replace_with_dynamic_overlap"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    personalize_episodes(episodes, names)
+    timings["personalize_episodes"] = time.perf_counter() - start
+    return timings
+
+
 if __name__ == "__main__":
     fake_episode = {
         "episode_id": None,
@@ -128,3 +238,10 @@ if __name__ == "__main__":
 
     new_episode = replace_with_dynamic_overlap(fake_episode)
     print(new_episode)
+
+    new_episodes = personalize_episodes([fake_episode])
+    print(new_episodes[0])
+
+    timings = benchmark_personalizer()
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds:.3f}s")
@@ -1,5 +1,8 @@
 import json
 import random
+import re
+import time
+from functools import lru_cache
 from personalized.generate_graph import gen_ownership
 from personalized.utils.graph_utils import convert_ownership_structure
 from itertools import chain
@@ -378,6 +381,51 @@ Return exactly one **raw JSON object** with the following structure, without any
 Now, based on the input provided above, generate the output JSON containing both the natural summary and the extracted summary, as described. Do not include any extra text."""
 
 
+# Templates indexed by level, looked up once instead of substring checks
+PROMPT_TEMPLATES = {
+    "easy": PROMPT_EASY,
+    "medium": PROMPT_MEDIUM,
+    "hard": PROMPT_HARD,
+}
+
+PROMPT_GRAPH_TEMPLATES = {
+    "easy": PROMPT_GRAPH_EASY,
+    "medium": PROMPT_GRAPH_MEDIUM,
+    "hard": PROMPT_GRAPH_MEDIUM,
+}
+
+# All template placeholders, substituted in a single regex pass
+PLACEHOLDER_PATTERN = re.compile(r"OTHER_SUMMARIES|N_SUMMARIES|MIN_OBJECTS|MAX_OBJECTS")
+
+
+@lru_cache(maxsize=None)
+def render_static_prompt(level, n_summaries, min_objects, max_objects):
+    """
+    Pre-renders the static part of a prompt for a given configuration.
+    The result is cached, so each (level, N_SUMMARIES, MIN/MAX) template
+    is only rendered once per process.
+
+    Args:
+        level (str): The difficulty level. Options are "easy", "medium", "hard".
+        n_summaries (int): The number of summaries to generate.
+        min_objects (int): Minimum number of objects per summary.
+        max_objects (int): Maximum number of objects per summary.
+
+    Returns:
+        str: The prompt with all placeholders substituted.
+    """
+    if level not in PROMPT_TEMPLATES:
+        raise ValueError(f"Invalid level: {level}. Choose from {list(PROMPT_TEMPLATES)}.")
+
+    values = {
+        "N_SUMMARIES": str(n_summaries),
+        "MIN_OBJECTS": str(min_objects),
+        "MAX_OBJECTS": str(max_objects),
+        "OTHER_SUMMARIES": str(int(n_summaries) - 1),
+    }
+    return PLACEHOLDER_PATTERN.sub(lambda m: values[m.group(0)], PROMPT_TEMPLATES[level])
+
+
 def generate_prompt(object_json, LEVEL="easy", N_SUMMARIES=6, MIN_OBJECTS=2, MAX_OBJECTS=6):
     """
     Generates a prompt for summarizing a list of objects in a house.
@@ -388,28 +436,15 @@ def generate_prompt(object_json, LEVEL="easy", N_SUMMARIES=6, MIN_OBJECTS=2, MAX
     Returns:
         str: A formatted prompt string.
     """
+    prompt = render_static_prompt(LEVEL, N_SUMMARIES, MIN_OBJECTS, MAX_OBJECTS)
     
-    # Convert the object list to JSON format
-    object_list_json = json.dumps(object_json, indent=2)
-    
-    if LEVEL in "easy":
-        PROMPT = PROMPT_EASY
-        
-    elif LEVEL in "medium":
-        PROMPT = PROMPT_MEDIUM
-        
-    elif LEVEL in "hard":
-        PROMPT = PROMPT_HARD
-    
-    # Replace placeholders in the prompt with actual values
-    prompt = PROMPT
-    prompt = prompt.replace("N_SUMMARIES", str(N_SUMMARIES))
-    prompt = prompt.replace("MIN_OBJECTS", str(MIN_OBJECTS))
-    prompt = prompt.replace("MAX_OBJECTS", str(MAX_OBJECTS))
-    prompt = prompt.replace("OTHER_SUMMARIES", str(int(N_SUMMARIES) - 1))
-    
-    # Combine the prompt and the object list
-    return prompt + "\n\n### Input:\n" + object_list_json + "\n\n### Output:\n"
+    # Combine the prompt and the object list in a single join
+    return "".join((
+        prompt,
+        "\n\n### Input:\n",
+        json.dumps(object_json, indent=2),
+        "\n\n### Output:\n",
+    ))
 
 
 def generate_prompt_from_graph(object_json, LEVEL="easy"):
@@ -425,8 +460,8 @@ def generate_prompt_from_graph(object_json, LEVEL="easy"):
         str: A formatted prompt string.
     """
     
-      # Convert the object list to JSON format
-    random.shuffle(object_json)
+    # Shuffle a copy, the caller's list is left untouched
+    object_json = random.sample(object_json, len(object_json))
     
     if LEVEL == "easy":
         mu = 1.0
@@ -471,13 +506,15 @@ def generate_prompt_from_graph(object_json, LEVEL="easy"):
     g_ownership = compact_person_dict(g_ownership)
     
     # Attach prompt 
-    PROMPT_GRAPH = (
-        PROMPT_GRAPH_EASY if LEVEL == "easy"
-        else PROMPT_GRAPH_MEDIUM if LEVEL == "medium"
-        else PROMPT_GRAPH_MEDIUM if LEVEL == "hard"
-        else PROMPT_GRAPH_MEDIUM  # fallback
-    )    
-    prompt = PROMPT_GRAPH + "\n\n**Input**:\n Objects:\n" + object_json_list + "\n\nOwnership:\n" + json.dumps(g_ownership, indent=2) + "\n\n**Output:**\n"
+    PROMPT_GRAPH = PROMPT_GRAPH_TEMPLATES.get(LEVEL, PROMPT_GRAPH_MEDIUM)  # fallback
+    prompt = "".join((
+        PROMPT_GRAPH,
+        "\n\n**Input**:\n Objects:\n",
+        object_json_list,
+        "\n\nOwnership:\n",
+        json.dumps(g_ownership, indent=2),
+        "\n\n**Output:**\n",
+    ))
     return {
         "prompt": prompt,
         "ownership": g_ownership,
@@ -490,4 +527,57 @@ def compact_person_dict(person_dict):
     Removes entries with empty lists and rewrites keys as person1, person2, ... without gaps.
     """
     non_empty = [v for v in person_dict.values() if v]
-    return {f'<person{i+1}>': v for i, v in enumerate(non_empty)}
\ No newline at end of file
+    return {f'<person{i+1}>': v for i, v in enumerate(non_empty)}
+
+
+def benchmark_generate_prompt(n_prompts=100_000, LEVEL="easy", N_SUMMARIES=3, MIN_OBJECTS=3, MAX_OBJECTS=4):
+    """
+    Micro-benchmark of the cached renderer against the previous
+    four-pass str.replace rendering.
+
+    Args:
+        n_prompts (int): Number of prompts to render with each method.
+
+    Returns:
+        dict: Total seconds spent by each method.
+    """
+    object_json = [
+        {
+            "object_category": "bed",
+            "object_id": f"bed_{i:03d}",
+            "room": "bedroom",
+            "floor_id": 0,
+            "description": ["a blue and white king-sized bed near the window"],
+            "position": [2.5, 3.0, 7.2],
+        }
+        for i in range(4)
+    ]
+
+    def _legacy_prompt():
+        prompt = PROMPT_TEMPLATES[LEVEL]
+        prompt = prompt.replace("N_SUMMARIES", str(N_SUMMARIES))
+        prompt = prompt.replace("MIN_OBJECTS", str(MIN_OBJECTS))
+        prompt = prompt.replace("MAX_OBJECTS", str(MAX_OBJECTS))
+        prompt = prompt.replace("OTHER_SUMMARIES", str(int(N_SUMMARIES) - 1))
+        return prompt + "\n\n### Input:\n" + json.dumps(object_json, indent=2) + "\n\n### Output:\n"
+
+    assert _legacy_prompt() == generate_prompt(object_json, LEVEL, N_SUMMARIES, MIN_OBJECTS, MAX_OBJECTS)
+
+    timings = {}
+    start = time.perf_counter()
+    for _ in range(n_prompts):
+        _legacy_prompt()
+    timings["legacy"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n_prompts):
+        generate_prompt(object_json, LEVEL, N_SUMMARIES, MIN_OBJECTS, MAX_OBJECTS)
+    timings["cached"] = time.perf_counter() - start
+    return timings
+
+
+if __name__ == "__main__":
+    timings = benchmark_generate_prompt()
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds:.3f}s")
+    print(f"Speedup: {timings['legacy'] / timings['cached']:.2f}x")
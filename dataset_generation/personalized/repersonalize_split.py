@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import gzip
+import time
+import random
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
+
+from personalized.personalize_episodes import replace_with_dynamic_overlap
+from personalized.utils.names import NAMES
+
+# Episode fields that mention owners by name
+TEXT_FIELDS = ["owner", "summary", "extracted_summary", "query"]
+
+# Owner name at the beginning of an extracted summary sentence
+OWNER_REGEX = re.compile(r"^(\S+) owns\b")
+
+
+def main(args):
+    """
+    Re-draws owner names of an existing split, e.g. to build name-shifted
+    evaluation variants, without regenerating the episodes.
+    Scenes are streamed one file at a time and processed in parallel, so
+    each worker only holds a single scene in memory.
+    """
+    content_dir = os.path.join(args.split_path, args.level, "content")
+    output_dir = os.path.join(args.output_path, args.level, "content")
+    os.makedirs(output_dir, exist_ok=True)
+
+    scene_files = sorted(f for f in os.listdir(content_dir) if f.endswith(".json.gz"))
+    jobs = [
+        (
+            os.path.join(content_dir, file_name),
+            os.path.join(output_dir, file_name),
+            f"{args.seed}-{file_name}",
+            args.exclude_original_names,
+        )
+        for file_name in scene_files
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.num_workers) as executor:
+        n_episodes = sum(executor.map(repersonalize_scene_file, *zip(*jobs)))
+
+    # Copy the category mapping file of the level
+    level_file = os.path.join(args.split_path, args.level, f"{args.level}.json.gz")
+    if os.path.exists(level_file):
+        shutil.copy(level_file, os.path.join(args.output_path, args.level))
+
+    print(f"Re-personalized {n_episodes} episodes in {len(scene_files)} scenes "
+          f"in {time.perf_counter() - start:.2f}s")
+    print(f"Split written to {os.path.join(args.output_path, args.level)}")
+
+
+def repersonalize_scene_file(
+    input_path: str,
+    output_path: str,
+    seed: str,
+    exclude_original_names: bool = False
+) -> int:
+    """
+    Re-draws names for a single scene file and writes the new shard.
+
+    Returns:
+        int: Number of episodes in the scene.
+    """
+    random.seed(seed)
+
+    with gzip.open(input_path, "rt", encoding="utf-8") as f:
+        scene = json.load(f)
+
+    scene["episodes"] = repersonalize_episodes(scene["episodes"], exclude_original_names)
+
+    with gzip.open(output_path, "wt", encoding="utf-8") as f:
+        json.dump(scene, f, indent=2)
+
+    return len(scene["episodes"])
+
+
+def repersonalize_episodes(
+    episodes: List[Dict[str, Any]],
+    exclude_original_names: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Episodes sharing the same summary describe the same people, so names
+    are mapped back to <personX> placeholders and re-drawn once per summary,
+    which keeps the new names consistent across those episodes.
+    """
+    name_list = sorted(NAMES)
+
+    # Groupby summary, keeping the original episode order
+    groups = {}
+    for ep in episodes:
+        groups.setdefault(ep["summary"], []).append(ep)
+
+    for group in groups.values():
+        names = collect_owner_names(group)
+        if not names:
+            continue
+
+        # Original names -> placeholders
+        placeholders = {name: f"<person{i + 1}>" for i, name in enumerate(names)}
+        name_regex = re.compile(
+            r"\b(" + "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True)) + r")\b"
+        )
+        texts = [
+            {field: to_placeholders(ep[field], name_regex, placeholders) for field in TEXT_FIELDS}
+            for ep in group
+        ]
+
+        # Placeholders -> new names, one mapping per summary
+        candidates = [n for n in name_list if n not in placeholders] if exclude_original_names else name_list
+        texts = replace_with_dynamic_overlap({"episodes": texts}, candidates)["episodes"]
+
+        for ep, new_texts in zip(group, texts):
+            ep.update(new_texts)
+
+    return episodes
+
+
+def collect_owner_names(episodes: List[Dict[str, Any]]) -> List[str]:
+    """
+    Returns the owners mentioned in a summary group, in order of appearance.
+    """
+    names = []
+    for ep in episodes:
+        candidates = [ep["owner"]]
+        for sentence in ep["extracted_summary"]:
+            match = OWNER_REGEX.match(sentence)
+            if match:
+                candidates.append(match.group(1))
+        for name in candidates:
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def to_placeholders(value: Any, name_regex: re.Pattern, placeholders: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return name_regex.sub(lambda m: placeholders[m.group(0)], value)
+    elif isinstance(value, list):
+        return [to_placeholders(v, name_regex, placeholders) for v in value]
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-draw owner names of a released split")
+
+    parser.add_argument("--split_path", type=str, default="../data/split", help="Base path of the released split")
+    parser.add_argument("--level", type=str, default="easy", help="Difficulty level of the split")
+    parser.add_argument("--output_path", type=str, default="../data/split_renamed", help="Base path for the new split")
+    parser.add_argument("--num_workers", type=int, default=os.cpu_count(), help="Number of scene files processed in parallel")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, combined with the scene file name")
+    parser.add_argument("--exclude_original_names", action="store_true", default=False, help="Never reuse the original names of a summary")
+
+    args = parser.parse_args()
+    main(args)
@@ -1,3 +1,4 @@
+import hashlib
 from typing import Dict, List
 import numpy as np
 import networkx as nx
@@ -68,4 +69,23 @@ def convert_ownership_structure(ownership_dict: Dict) -> Dict:
     for owner, objects in ownership_dict.items():
         for obj in objects:
             selected_items.append({"object_id": obj, "owner": owner})
-    return {"selected_items": selected_items}
\ No newline at end of file
+    return {"selected_items": selected_items}
+
+def canonical_ownership(ownership_dict: Dict[str, List[str]]) -> tuple:
+    """
+    Canonical form of an ownership graph, invariant to the <personX> labels
+    and to the order of objects. It combines the sorted degree signature of
+    the people, the object set and the sorted per-person object sets, so two
+    graphs that only differ by a relabeling of people map to the same key.
+    """
+    neighbourhoods = sorted(tuple(sorted(objs)) for objs in ownership_dict.values() if objs)
+    degree_signature = tuple(sorted(len(objs) for objs in neighbourhoods))
+    object_set = tuple(sorted({o for objs in neighbourhoods for o in objs}))
+    return degree_signature, object_set, tuple(neighbourhoods)
+
+
+def ownership_hash(ownership_dict: Dict[str, List[str]]) -> str:
+    """
+    Stable hash of the canonical form of an ownership graph.
+    """
+    return hashlib.sha1(repr(canonical_ownership(ownership_dict)).encode("utf-8")).hexdigest()
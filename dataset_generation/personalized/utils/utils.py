@@ -4,6 +4,8 @@ import os
 import gzip
 from typing import List, Dict, Any
 
+from habitat_tf.scene_catalog import get_catalog, DEFAULT_SCENES_ROOT
+
 def generate_single_response(prompt, model_type="gpt-4o-mini"):
     """
     Generates direct response to a prompt using the OpenAI Chat API.
@@ -25,12 +27,10 @@ def get_scene_path(split, name):
     # Get the scene path for a given split and name
     split = "val" if "val" in split else "train"
     
-    base_path = f"data/scene_datasets/hm3d_v0.2/{split}"
-    for folder_name in os.listdir(base_path):
-        if folder_name.endswith(f"-{name}"):
-            number = folder_name.split('-')[0]
-            return f"hm3d_v0.2/{split}/{number}-{name}/{name}.basis.glb"
-    return None
+    glb = get_catalog(DEFAULT_SCENES_ROOT).path(split, name)
+    if glb is None:
+        return None
+    return f"hm3d_v0.2/{glb}"
 
 def write_retrieval_episodes(episodes, scene_id, split, level, base_dir="data/datasets/eai_pers"):
     
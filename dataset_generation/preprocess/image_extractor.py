@@ -4,17 +4,22 @@ import gzip
 import json
 import numpy as np
 import habitat_sim
-from PIL import Image
 from itertools import groupby
 from pathlib import Path
 from typing import List, Tuple
 import argparse
+import sys
+from collections import OrderedDict
 
 # Simulator settings
 import habitat_sim
 
 # Utils imports
-from utils import sample_random_points, get_current_floor, get_obs_image, zip_image_folder
+from utils import load_floor_model, assign_floors, get_obs_images, ImageArchiveWriter, RENDER_STATS
+
+# Repo imports, habitat_tf lives next to this script's folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from habitat_tf.scene_catalog import get_catalog
 
 
 def parse_args():
@@ -25,6 +30,14 @@ def parse_args():
     parser.add_argument("--save_json", action="store_true", default=True, help="Save JSON files")
     parser.add_argument("--single_floor_scenes", action="store_true", default=False, help="Process only single-floor scenes")
     parser.add_argument("--filter_unallowed", action="store_true", default=True, help="Filter unallowed objects")
+    parser.add_argument("--render_agents", type=int, default=4, help="Agents rendering image goals in a single observation call")
+    parser.add_argument("--image_format", type=str, default="png", choices=["png", "webp"], help="Image encoding, webp is lossless")
+    parser.add_argument("--png_compress_level", type=int, default=6, help="PNG zlib compression level (0-9)")
+    parser.add_argument("--encode_workers", type=int, default=4, help="Threads encoding and writing images")
+    parser.add_argument("--max_pending_frames", type=int, default=256, help="Frames queued for encoding before rendering waits")
+    parser.add_argument("--max_cached_frames", type=int, default=64, help="With --streaming, rendered frames kept to share poses between goals")
+    parser.add_argument("--streaming", action="store_true", default=False, help="Hand each goal's images to the writer as soon as they are rendered, holding at most max_pending_frames + max_cached_frames frames; without it every frame of the scene is held until the scene is written")
+    parser.add_argument("--floor_model_dir", type=str, default=None, help="Directory caching the floor heights of each scene (default: data/floor_models)")
     
     return parser.parse_args()
 
@@ -35,6 +48,13 @@ SAVE_IMAGES = args.save_images
 SAVE_JSON = args.save_json
 SINGLE_FLOOR_SCENES = args.single_floor_scenes
 FILTER_UNALLOWED = args.filter_unallowed
+RENDER_AGENTS = args.render_agents
+IMAGE_FORMAT = args.image_format
+PNG_COMPRESS_LEVEL = args.png_compress_level
+ENCODE_WORKERS = args.encode_workers
+MAX_PENDING_FRAMES = args.max_pending_frames
+MAX_CACHED_FRAMES = args.max_cached_frames
+STREAMING = args.streaming
 SPLIT = args.split
 SN_SPLIT = "val" if "val" in SPLIT else "train"
 
@@ -46,6 +66,7 @@ DATA_PATH = os.path.abspath(os.path.join(DIR_PATH, "../data"))
 
 BASE_SCENES_PATH = os.path.join(DATA_PATH, "scene_datasets", "hm3d_v0.2", SN_SPLIT)
 FOLDER_PATH = os.path.join(DATA_PATH, "datasets", "goat_bench", "hm3d", "v3", SPLIT, "content")
+FLOOR_MODEL_PATH = args.floor_model_dir or os.path.join(DATA_PATH, "floor_models")
 
 #########
 # DEBUG #
@@ -77,6 +98,8 @@ def main():
         scenes_file_name='unallowed_scenes.txt')
     
     n_goals = 0
+    # Images of the previous scene, still being encoded while the next one renders
+    writer = None
     for file_name in os.listdir(FOLDER_PATH):
         
         # Skip non-JSON files.
@@ -86,20 +109,29 @@ def main():
         scene_id = file_name.split('.')[0]
         file_path = os.path.join(FOLDER_PATH, file_name)
         
-        # Process the scene to get grouped scene goals.
-        grouped_goals = process_scene_file(file_path, scene_id)
+        # Filter scenes that are in the unallowed scenes list, before loading them.
+        if FILTER_UNALLOWED and scene_id in unallowed_scenes:
+            print("Skipping unallowed scene:", scene_id)
+            continue
         
-        # Remove all goals that contain unallowed objects.
-        if FILTER_UNALLOWED:
-            
-            # Filter scenes that are not in the unallowed scenes list.
-            if scene_id in unallowed_scenes:
-                print("Skipping unallowed scene:", scene_id)
-                continue
-            
-            # Filter unallowed objects
-            grouped_goals = [[goal for goal in floor if goal['object_category'] not in unallowed_objects] for floor in grouped_goals]
-            grouped_goals = [floor for floor in grouped_goals if floor]
+        # In streaming mode images go to the archive while the scene is processed:
+        # at most MAX_PENDING_FRAMES frames wait for encoding and MAX_CACHED_FRAMES
+        # are kept to share poses between goals, instead of every frame of the scene.
+        if STREAMING and USE_IMG_ANNOTS and SAVE_IMAGES:
+            if writer is not None:
+                writer.close()
+            writer = open_image_writer(DIR_PATH, scene_id)
+        
+        # Process the scene to get grouped scene goals.
+        # Unallowed objects are removed before their images are rendered.
+        grouped_goals = process_scene_file(
+            file_path,
+            scene_id,
+            unallowed_objects=unallowed_objects if FILTER_UNALLOWED else None,
+            single_floor=SINGLE_FLOOR_SCENES,
+            writer=writer if STREAMING else None,
+            max_cached_frames=MAX_CACHED_FRAMES if STREAMING else None,
+        )
 
         # Filter invalid floors based on a text file. The idea is that we can only use floors that we mapped.
         # grouped_goals = filter_invalid_floors(repo_root, grouped_goals, scene_id)
@@ -114,8 +146,10 @@ def main():
             continue
         
         # Save images if enabled.
-        if USE_IMG_ANNOTS and SAVE_IMAGES:
-            save_images(DIR_PATH, grouped_goals, scene_id)
+        if USE_IMG_ANNOTS and SAVE_IMAGES and not STREAMING:
+            if writer is not None:
+                writer.close()
+            writer = save_images(DIR_PATH, grouped_goals, scene_id)
         
         # Save JSON files if enabled.
         if SAVE_JSON:
@@ -125,7 +159,12 @@ def main():
 
         n_goals += sum(len(floor) for floor in grouped_goals)
     
+    if writer is not None:
+        writer.close()
     print("N° of goals:", n_goals)
+    if RENDER_STATS['requested']:
+        print(f"Renders: {RENDER_STATS['rendered']}/{RENDER_STATS['requested']} "
+              f"({RENDER_STATS['avoided']} avoided by deduplication)")
     
 
 def load_basis_glb_file(base_path: str, scene_name: str) -> str:
@@ -141,33 +180,28 @@ def load_basis_glb_file(base_path: str, scene_name: str) -> str:
     Raises:
         FileNotFoundError: If folder or file not found
     """
-    base_dir = Path(base_path)
-    folder_suffix = f"-{scene_name}"
-    
-    # Find first matching directory
-    try:
-        scene_folder = next(
-            p for p in base_dir.iterdir()
-            if p.is_dir() and p.name.endswith(folder_suffix)
-        )
-        print(scene_folder)
-    except StopIteration:
+    # base_path is <scenes root>/<split>
+    catalog = get_catalog(os.path.dirname(os.path.abspath(base_path)))
+    entry = catalog.get(os.path.basename(os.path.normpath(base_path)), scene_name)
+    if entry is None:
         raise FileNotFoundError(
-            f"No folder ending with '{folder_suffix}' found in {base_path}"
-        ) from None
+            f"No folder ending with '-{scene_name}' found in {base_path}"
+        )
+    print(os.path.join(base_path, entry["folder"]))
 
     # Validate file existence
-    glb_path = scene_folder / f"{scene_name}.basis.glb"
-    if not glb_path.exists():
+    if entry["glb"] is None:
         raise FileNotFoundError(
-            f"Scene file {glb_path.name} not found in {scene_folder}"
+            f"Scene file {scene_name}.basis.glb not found in {os.path.join(base_path, entry['folder'])}"
         )
+    glb_path = os.path.join(catalog.root, entry["glb"])
 
     return str(glb_path)
 
 def make_simple_cfg(
     settings: dict,
-    use_equirectangular: bool = False
+    use_equirectangular: bool = False,
+    num_agents: int = 1
 ) -> habitat_sim.Configuration:
     """Create a Habitat simulator configuration with basic RGB sensor setup.
     
@@ -178,6 +212,7 @@ def make_simple_cfg(
             - sensor_height: Height offset for camera
             - hfov: Horizontal field of view
         use_equirectangular: Enable 360° equirectangular projection
+        num_agents: Number of identical agents, used to render several poses per step
             
     Returns:
         Habitat simulator configuration object
@@ -201,7 +236,7 @@ def make_simple_cfg(
     agent_config = habitat_sim.agent.AgentConfiguration()
     agent_config.sensor_specifications = [rgb_sensor]
 
-    return habitat_sim.Configuration(sim_config, [agent_config])
+    return habitat_sim.Configuration(sim_config, [agent_config] * num_agents)
 
 def create_filtered_objects(target_goal, floor_id, save_view_points=False):
     filtered_objects = {}
@@ -295,13 +330,25 @@ def filter_invalid_floors(repo_root, grouped_goals, scene_id, txt_path="valid_fl
 
     return grouped_goals
 
-def process_scene_file(file_path, scene_id):
+def process_scene_file(
+    file_path,
+    scene_id,
+    unallowed_objects=None,
+    single_floor=False,
+    writer=None,
+    max_cached_frames=None
+):
     """
     Process a single scene file and return the grouped scene goals.
     
     Args:
         file_path (str): Path to the .json.gz file.
         scene_id (str): Identifier for the scene.
+        unallowed_objects (list): Object categories to drop before rendering.
+        single_floor (bool): Skip the scene (empty result) if the goals span several floors.
+        writer (ImageArchiveWriter): Streaming mode, each goal's images are handed to
+            the writer as soon as they are rendered instead of being stored in the goal.
+        max_cached_frames (int): Rendered frames kept to share poses between goals.
     
     Returns:
         list: A list of lists where each inner list contains goals grouped by floor.
@@ -317,7 +364,7 @@ def process_scene_file(file_path, scene_id):
     
     # Setup the Habitat Simulator for the current scene.
     SIM_SETTINGS["scene"] = scene_path
-    cfg = make_simple_cfg(SIM_SETTINGS)
+    cfg = make_simple_cfg(SIM_SETTINGS, num_agents=RENDER_AGENTS if USE_IMG_ANNOTS else 1)
     
     # Close any previous simulator instance.
     try:
@@ -326,59 +373,98 @@ def process_scene_file(file_path, scene_id):
         pass
     sim = habitat_sim.Simulator(cfg)
     
-    # Initialize the agent if image annotations are used.
+    # Initialize the agents if image annotations are used.
+    agent_ids = []
     if USE_IMG_ANNOTS:
-        agent = sim.initialize_agent(SIM_SETTINGS["default_agent"])
-        agent_state = habitat_sim.AgentState()
-    else:
-        agent = None
-        agent_state = None
+        agent_ids = list(range(RENDER_AGENTS))
+        for agent_id in agent_ids:
+            sim.initialize_agent(agent_id)
+    
+    # Floor heights are computed once per scene (and cached on disk),
+    # then all goals are assigned to floors in one vectorized call.
+    floor_heights = load_floor_model(sim, scene_id, cache_dir=FLOOR_MODEL_PATH)
+    get_catalog(os.path.dirname(BASE_SCENES_PATH)).set_num_floors(SN_SPLIT, scene_id, len(floor_heights))
+    
+    all_goals = [target_goal for goals in scene_objects.values() for target_goal in goals]
+    vp_heights = np.full(len(all_goals), np.nan)
+    for i, target_goal in enumerate(all_goals):
+        try:
+            # Use the first view point to determine the floor.
+            vp_heights[i] = target_goal['view_points'][0]['agent_state']['position'][1]
+        except Exception as e:
+            # Here instead of skipping the image we could take the object position
+            # SCENE: 00803-k1cupFYWXJ6 we have to skip due to scene irregularities (it's a fucking castle)
+            print("View point for floor extraction not found:", e)
+    floor_ids = assign_floors(vp_heights, floor_heights)
+    
+    # Goals are filtered before rendering, so no image of a discarded goal is rendered:
+    # goals without view points (reported above), unallowed objects and, with image
+    # annotations, goals without image goals.
+    unallowed_objects = set(unallowed_objects or [])
+    kept_goals = [
+        (target_goal, int(floor_id))
+        for target_goal, vp_height, floor_id in zip(all_goals, vp_heights, floor_ids)
+        if not np.isnan(vp_height)
+        and target_goal['object_category'] not in unallowed_objects
+        and not (agent_ids and not target_goal.get('image_goals'))
+    ]
+    if single_floor and len({floor_id for _, floor_id in kept_goals}) > 1:
+        print("Skipping multi-floor scene:", scene_id)
+        sim.close()
+        return []
     
     scene_goals = []
+    goal_candidates = []
+    # Rendered poses shared between goals, bounded by max_cached_frames
+    rendered = OrderedDict()
     # Iterate over each goal within the scene.
-    for _, goals in scene_objects.items():
-        for target_goal in goals:
-            try:
-                # Use the first view point to determine the floor.
-                vp_height = target_goal['view_points'][0]['agent_state']['position'][1]
-                floor_id = get_current_floor(vp_height, sample_random_points(sim))
-            except Exception as e:
-                # Here instead of skipping the image we could take the object position
-                # SCENE: 00803-k1cupFYWXJ6 we have to skip due to scene irregularities (it's a fucking castle)
-                print("View point for floor extraction not found:", e)
-                continue
-            
-            # Create a filtered object based on the target goal.
-            filtered_object = create_filtered_objects(target_goal, floor_id)
+    for target_goal, floor_id in kept_goals:
+        # Create a filtered object based on the target goal.
+        filtered_object = create_filtered_objects(target_goal, floor_id)
+        
+        # If image annotations are enabled, process and add images.
+        if agent_ids:
+            image_goals = target_goal['image_goals']
+
+            # Get images sorted by distance (using Euclidean norm)
+            top_x_dist = sorted(
+                image_goals,
+                key=lambda x: np.linalg.norm(np.array(x['position']) - np.array(target_goal['position'])) , reverse=True
+            )[:6]  # Select top 4 distant images
+
+            # Get images with highest object and frame coverage.
+            top_cov = sorted(top_x_dist, key=lambda x: x.get('object_coverage', 0), reverse=True)[0]
+            top_frame = sorted(top_x_dist, key=lambda x: x.get('frame_coverage', 0), reverse=True)[0]
             
-            # If image annotations are enabled, process and add images.
-            if USE_IMG_ANNOTS and agent is not None and agent_state is not None:
-                image_goals = target_goal.get('image_goals', [])
-                if not image_goals:
-                    continue
-
-                # Get images sorted by distance (using Euclidean norm)
-                top_x_dist = sorted(
-                    image_goals,
-                    key=lambda x: np.linalg.norm(np.array(x['position']) - np.array(target_goal['position'])) , reverse=True
-                )[:6]  # Select top 4 distant images
-
-                # Get images with highest object and frame coverage.
-                top_cov = sorted(top_x_dist, key=lambda x: x.get('object_coverage', 0), reverse=True)[0]
-                top_frame = sorted(top_x_dist, key=lambda x: x.get('frame_coverage', 0), reverse=True)[0]
-                
-                # Ensure that there are at least two images from the distance sorting.
-                if len(top_x_dist) < 2:
-                    top_x_dist = top_x_dist * 2
-
-                # Retrieve observation images.
-                obs = []
-                for candidate in [top_x_dist[0], top_x_dist[1], top_cov, top_frame]:
-                    obs_image = get_obs_image(candidate, SIM_SETTINGS, agent_state, agent, sim)
-                    obs.append(obs_image)
-                filtered_object['image'] = obs
-
-            scene_goals.append(filtered_object)
+            # Ensure that there are at least two images from the distance sorting.
+            if len(top_x_dist) < 2:
+                top_x_dist = top_x_dist * 2
+            candidates = [top_x_dist[0], top_x_dist[1], top_cov, top_frame]
+
+            if writer is None:
+                # Observation images are rendered below for the whole scene.
+                goal_candidates.append((filtered_object, candidates))
+            else:
+                # Streaming: render this goal now and hand its frames to the writer.
+                # Room is made for the new frames first, so the cache never holds
+                # more than max_cached_frames, even while submit waits for the writer.
+                while max_cached_frames is not None and rendered and len(rendered) > max_cached_frames - len(candidates):
+                    rendered.popitem(last=False)
+                images = get_obs_images(candidates, SIM_SETTINGS, agent_ids, sim, rendered)
+                for i, image in enumerate(images):
+                    writer.submit(f"{filtered_object['object_id']}_{i}", image)
+
+        scene_goals.append(filtered_object)
+    
+    # Render the candidate poses of all goals at once: poses repeated within
+    # a goal or shared between goals are rendered a single time.
+    if goal_candidates:
+        images = get_obs_images(
+            [candidate for _, candidates in goal_candidates for candidate in candidates],
+            SIM_SETTINGS, agent_ids, sim, rendered
+        )
+        for k, (filtered_object, candidates) in enumerate(goal_candidates):
+            filtered_object['image'] = images[4 * k:4 * (k + 1)]
     
     # Group the scene goals by floor_id.
     scene_goals_sorted = sorted(scene_goals, key=lambda x: x['floor_id'])
@@ -387,30 +473,48 @@ def process_scene_file(file_path, scene_id):
     sim.close()
     return grouped_goals
 
+def open_image_writer(base_path, scene_id):
+    """
+    ImageArchiveWriter streaming into the scene's images.zip, and writing the
+    same files to its images folder.
+    
+    Args:
+        scene_id (str): Identifier for the scene.
+    """
+    scene_folder = os.path.join(base_path, "../data", "datasets", "eai_pers", SPLIT, scene_id)
+    os.makedirs(scene_folder, exist_ok=True)
+    
+    return ImageArchiveWriter(
+        os.path.join(scene_folder, "images.zip"),
+        folder=os.path.join(scene_folder, "images"),
+        image_format=IMAGE_FORMAT,
+        compress_level=PNG_COMPRESS_LEVEL,
+        max_pending=MAX_PENDING_FRAMES,
+        num_workers=ENCODE_WORKERS,
+    )
+
 def save_images(base_path, scene_goals, scene_id):
     """
-    Save observation images to disk and zip the image folder.
+    Stream observation images into the scene's images folder and images.zip.
+    Images are encoded once on a thread pool, the folder is not re-read to zip it.
     
     Args:
         scene_goals (list): Grouped scene goals.
         scene_id (str): Identifier for the scene.
-    """
-    images_folder = os.path.join(base_path, "../data", "datasets", "eai_pers", SPLIT, scene_id, "images")
-    os.makedirs(images_folder, exist_ok=True)
     
+    Returns:
+        ImageArchiveWriter: The writer, which may still be encoding. Call close()
+        to wait for it and finalize the archive.
+    """
+    writer = open_image_writer(base_path, scene_id)
     for floor in scene_goals:
         for obj in floor:
             for i, image in enumerate(obj.get('image', [])):
-                pil_image = Image.fromarray(image)
-                image_filename = f"{obj['object_id']}_{i}.png"
-                image_path = os.path.join(images_folder, image_filename)
-                pil_image.save(image_path)
-            # Remove image data from the dictionary after saving.
+                writer.submit(f"{obj['object_id']}_{i}", image)
+            # Remove image data from the dictionary after queuing.
             if 'image' in obj:
                 del obj['image']
-    
-    # Zip the images folder (function assumed to be defined elsewhere).
-    zip_image_folder(images_folder, remove_unzipped=False)
+    return writer
 
 def save_json(base_path, scene_goals, scene_id, by_floor=False):
     """
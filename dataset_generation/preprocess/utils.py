@@ -1,11 +1,19 @@
 import numpy as np
-from typing import Dict, List, Optional, Any
+from collections import Counter
+from typing import Dict, List, Optional, Any, Tuple
 import habitat_sim
 import shutil
 import json
 import gzip
 import os
 import quaternion
+import io
+import time
+import zipfile
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
 # import cv2  # Optional: for advanced image stitching
 
 """
@@ -82,13 +90,77 @@ def sample_random_points(
         
     return points_floors
 
+def navmesh_triangles(sim: habitat_sim.Simulator) -> np.ndarray:
+    """Triangles of the scene navmesh as a (T, 3, 3) array."""
+    if hasattr(sim, "navmesh_triangles"):
+        return sim.navmesh_triangles()
+    # Every 3 consecutive vertices form a triangle
+    return np.array(sim.pathfinder.build_navmesh_vertices(), dtype=float).reshape(-1, 3, 3)
+
+def detect_floors(
+    sim: habitat_sim.Simulator,
+    bin_size: float = 0.1,
+    min_bin_fraction: float = 0.01,
+    floor_gap: float = 0.5,
+    significance_threshold: float = 0.2
+) -> Dict[float, np.ndarray]:
+    """Detect floor levels from the navmesh triangles, deterministically.
+    
+    Triangle heights are histogrammed with fixed bins weighted by the triangle
+    footprint area. Sparse bins (stairs, ramps) are dropped, the remaining bins
+    closer than `floor_gap` are merged into a floor band, and bands holding
+    less than `significance_threshold` of the navigable area are discarded.
+    
+    Args:
+        sim: Habitat simulator instance (or anything with a pathfinder)
+        bin_size: Height bin size in meters
+        min_bin_fraction: Minimum area fraction of a bin to be part of a floor
+        floor_gap: Maximum height gap between bins of the same floor
+        significance_threshold: Minimum area fraction to consider a floor level
+        
+    Returns:
+        Dictionary mapping floor heights (area-weighted mean, ascending) to
+        their [min, max] height band
+    """
+    triangles = navmesh_triangles(sim)
+    if len(triangles) == 0:
+        return {}
+    heights = triangles[:, :, 1].mean(axis=1)
+    # Footprint area on the XZ plane
+    edges_1 = triangles[:, 1] - triangles[:, 0]
+    edges_2 = triangles[:, 2] - triangles[:, 0]
+    areas = 0.5 * np.abs(edges_1[:, 2] * edges_2[:, 0] - edges_1[:, 0] * edges_2[:, 2])
+    total_area = areas.sum()
+    if total_area <= 0:
+        return {}
+    
+    # Area-weighted height histogram with fixed bins
+    start = np.floor(heights.min() / bin_size) * bin_size
+    n_bins = int(np.ceil((heights.max() - start) / bin_size)) + 1
+    bins = np.clip(((heights - start) / bin_size).astype(int), 0, n_bins - 1)
+    bin_areas = np.bincount(bins, weights=areas, minlength=n_bins)
+    
+    # Merge the dense bins into floor bands
+    dense = np.flatnonzero(bin_areas / total_area >= min_bin_fraction)
+    if len(dense) == 0:
+        return {}
+    breaks = np.flatnonzero(np.diff(dense) * bin_size > floor_gap) + 1
+    
+    floors = {}
+    for band in np.split(dense, breaks):
+        in_band = (bins >= band[0]) & (bins <= band[-1])
+        if areas[in_band].sum() / total_area < significance_threshold:
+            continue
+        height = float(np.average(heights[in_band], weights=areas[in_band]))
+        floors[height] = np.array([heights[in_band].min(), heights[in_band].max()])
+    return floors
+
 def floors_num(
     sim: habitat_sim.Simulator,
-    volume_sample_fac: float = 1.0,
     significance_threshold: float = 0.2
 ) -> int:
     """Count the number of detectable floor levels in the scene."""
-    return len(sample_random_points(sim, volume_sample_fac, significance_threshold))
+    return len(detect_floors(sim, significance_threshold=significance_threshold))
 
 def get_floor_levels(
     current_height: float,
@@ -98,7 +170,7 @@ def get_floor_levels(
     
     Args:
         current_height: The height to compare against floor levels
-        floor_points: Dictionary mapping floor heights to their corresponding points
+        floor_points: Dictionary keyed by floor heights, e.g. from detect_floors
         
     Returns:
         Dictionary with:
@@ -128,13 +200,67 @@ def get_current_floor(
     
     Args:
         current_height: The height to compare against floor levels
-        floor_points: Dictionary mapping floor heights to their corresponding points
+        floor_points: Dictionary keyed by floor heights, e.g. from detect_floors
         
     Returns:
-        The index of the closest floor level (0-based)
+        The index of the closest floor level (0-based, floors sorted by height)
     """
-    closest_key = min(floor_points.keys(), key=lambda k: abs(k - current_height))
-    return list(floor_points.keys()).index(closest_key)
+    floor_heights = sorted(floor_points.keys())
+    closest_key = min(floor_heights, key=lambda k: abs(k - current_height))
+    return floor_heights.index(closest_key)
+
+def assign_floors(
+    heights: np.ndarray,
+    floor_heights: List[float]
+) -> np.ndarray:
+    """Vectorized get_current_floor for many heights at once.
+    
+    Floors are split halfway between consecutive floor heights, so each height
+    gets the index of the closest floor.
+    
+    Args:
+        heights: Heights to assign, any shape
+        floor_heights: Floor heights in ascending order
+        
+    Returns:
+        Array of 0-based floor indices with the shape of `heights`
+    """
+    floor_heights = np.asarray(floor_heights, dtype=float)
+    edges = (floor_heights[1:] + floor_heights[:-1]) / 2
+    return np.searchsorted(edges, np.asarray(heights, dtype=float))
+
+FLOOR_MODEL_METHOD = "navmesh"
+
+def load_floor_model(
+    sim: habitat_sim.Simulator,
+    scene_id: str,
+    cache_dir: Optional[str] = None
+) -> List[float]:
+    """Floor heights of a scene, computed once and cached on disk.
+    
+    Args:
+        sim: Habitat simulator instance with the scene loaded
+        scene_id: Scene name, used as the cache file name
+        cache_dir: Directory of the cached floor models, no caching if None
+        
+    Returns:
+        Floor heights in ascending order, floor ids are indices in this list
+    """
+    cache_path = os.path.join(cache_dir, f"{scene_id}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'r') as f:
+            model = json.load(f)
+        # Models computed with another floor detector are recomputed
+        if model.get("method") == FLOOR_MODEL_METHOD:
+            return model["floor_heights"]
+    
+    floor_heights = sorted(float(h) for h in detect_floors(sim).keys())
+    
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({"method": FLOOR_MODEL_METHOD, "floor_heights": floor_heights}, f)
+    return floor_heights
 
 """
 Image utils
@@ -147,22 +273,233 @@ def zip_image_folder(folder_to_zip, remove_unzipped=True):
     # Remove the unzipped version
     if remove_unzipped:
         shutil.rmtree(folder_to_zip)
+
+IMAGE_FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+def encode_image(image: np.ndarray, image_format: str = "png", compress_level: int = 6) -> bytes:
+    """Encode an RGB(A) frame as PNG (zlib `compress_level` 0-9) or lossless WebP."""
+    buffer = io.BytesIO()
+    if image_format == "webp":
+        Image.fromarray(image).save(buffer, format="WEBP", lossless=True)
+    else:
+        Image.fromarray(image).save(buffer, format="PNG", compress_level=compress_level)
+    return buffer.getvalue()
+
+class ImageArchiveWriter:
+    """
+    Bounded producer/consumer pipeline writing frames into a zip archive.
+    
+    `submit` hands a frame to a thread pool that encodes it and appends it to
+    the archive, so rendering continues while earlier frames are encoded. At
+    most `max_pending` frames are in flight: `submit` blocks beyond that,
+    which bounds the memory held by the pipeline. Images are stored as is in
+    the archive, they are already compressed. With `folder`, the encoded files
+    are also written there, for the readers of the images folder (annotators).
+    """
+    
+    def __init__(
+        self,
+        zip_path: str,
+        image_format: str = "png",
+        compress_level: int = 6,
+        max_pending: int = 64,
+        num_workers: int = 4,
+        folder: Optional[str] = None
+    ):
+        assert image_format in IMAGE_FORMATS, f"Unknown image format {image_format}"
+        self.zip_path = zip_path
+        self.image_format = image_format
+        self.compress_level = compress_level
+        self.folder = folder
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.n_written = 0
+        # Opened with the first frame, no archive is written for a scene without images
+        self._zip = None
+        self._zip_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._futures = []
+    
+    def submit(self, name: str, image: np.ndarray) -> None:
+        """Queue a frame as `<name>.<format>` in the archive, blocks while the pipeline is full."""
+        self._slots.acquire()
+        try:
+            self._futures.append(self._executor.submit(self._write, f"{name}.{self.image_format}", image))
+        except BaseException:
+            self._slots.release()
+            raise
+        # Surface encoding errors early and drop finished futures
+        done = [f for f in self._futures if f.done()]
+        self._futures = [f for f in self._futures if not f.done()]
+        for future in done:
+            future.result()
+    
+    def _write(self, file_name: str, image: np.ndarray) -> None:
+        try:
+            data = encode_image(image, self.image_format, self.compress_level)
+            if self.folder:
+                with open(os.path.join(self.folder, file_name), 'wb') as f:
+                    f.write(data)
+            with self._zip_lock:
+                if self._zip is None:
+                    self._zip = zipfile.ZipFile(f"{self.zip_path}.tmp", "w", compression=zipfile.ZIP_STORED)
+                self._zip.writestr(file_name, data)
+                self.n_written += 1
+        finally:
+            self._slots.release()
+    
+    def close(self) -> None:
+        """Wait for the pending frames and finalize the archive."""
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        if self._zip is None:
+            return
+        self._zip.close()
+        self._zip = None
+        # The archive only appears once complete
+        os.replace(f"{self.zip_path}.tmp", self.zip_path)
+    
+    def __enter__(self) -> "ImageArchiveWriter":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
         
 def get_obs_image(max_key, sim_settings, agent_state, agent, sim):
-    max_key['position'][1] -= sim_settings["sensor_height"]
-    agent_state.position = np.array(max_key['position'])
+    # Image goal positions are camera positions, the agent stands below.
+    # The image goal itself is left untouched, it can be rendered again.
+    agent_state.position = np.array(max_key['position'], dtype=float)
+    agent_state.position[1] -= sim_settings["sensor_height"]
     agent_state.rotation = np.array(max_key['rotation'])
     agent.set_state(agent_state)
     
     # RGB observation
     return sim.get_sensor_observations()['rgb']
 
+# Renders requested, done and avoided by deduplication, reported at the end of a run
+RENDER_STATS = Counter()
+
+def pose_key(image_goal: Dict[str, Any], decimals: int = 3) -> Tuple:
+    """Hashable camera pose of an image goal, rounded to `decimals`."""
+    return (
+        tuple(np.round(image_goal['position'], decimals)),
+        tuple(np.round(image_goal['rotation'], decimals)),
+    )
+
+def get_obs_images(
+    image_goals: List[Dict[str, Any]],
+    sim_settings: dict,
+    agent_ids: List[int],
+    sim: habitat_sim.Simulator,
+    rendered: Optional[Dict[Tuple, np.ndarray]] = None
+) -> List[np.ndarray]:
+    """Render the RGB observations of many image goals with few simulator calls.
+    
+    Identical poses are rendered once, and poses already in `rendered` are not
+    rendered again. The remaining poses are spread over the agents in
+    `agent_ids` (one RGB sensor each) so a single get_sensor_observations
+    call renders up to len(agent_ids) of them.
+    
+    Args:
+        image_goals: Image goals with 'position' (camera) and 'rotation'
+        sim_settings: Simulation settings dictionary
+        agent_ids: Agents used to render in parallel
+        sim: Habitat simulator instance
+        rendered: Optional {pose_key: image} cache shared across calls, updated in place
+        
+    Returns:
+        One RGB image per image goal, in order. Duplicate poses share the same array.
+    """
+    rendered = {} if rendered is None else rendered
+    keys = [pose_key(image_goal) for image_goal in image_goals]
+    RENDER_STATS['requested'] += len(keys)
+    
+    # Unique poses not rendered yet, in order of first appearance
+    todo = {}
+    for key, image_goal in zip(keys, image_goals):
+        if key not in rendered and key not in todo:
+            todo[key] = image_goal
+    todo = list(todo.items())
+    
+    agent_state = habitat_sim.AgentState()
+    for start in range(0, len(todo), len(agent_ids)):
+        batch = todo[start:start + len(agent_ids)]
+        for agent_id, (_, image_goal) in zip(agent_ids, batch):
+            agent_state.position = np.array(image_goal['position'], dtype=float)
+            agent_state.position[1] -= sim_settings["sensor_height"]
+            agent_state.rotation = np.array(image_goal['rotation'])
+            sim.get_agent(agent_id).set_state(agent_state)
+        
+        # One observation call for the whole batch
+        observations = sim.get_sensor_observations(agent_ids=list(agent_ids[:len(batch)]))
+        for agent_id, (key, _) in zip(agent_ids, batch):
+            rendered[key] = observations[agent_id]['rgb']
+    
+    RENDER_STATS['rendered'] += len(todo)
+    RENDER_STATS['avoided'] += len(keys) - len(todo)
+    return [rendered[key] for key in keys]
+
+
+CAPTURE_360_MODES = ("rotate", "ring", "equirect")
 
-def get_360_composite_image(sim, sim_settings, agent_state, agent, base_rotation, num_views=20):
+def make_360_cfg(
+    settings: dict,
+    num_views: int = 20,
+    mode: str = "ring"
+) -> habitat_sim.Configuration:
+    """Create a Habitat simulator configuration for get_360_composite_image.
+    
+    Args:
+        settings: Configuration parameters (scene, width, height, sensor_height, hfov)
+        num_views: Number of views around the 360° circle
+        mode: One of CAPTURE_360_MODES:
+            - rotate: a single "rgb" sensor, the agent is rotated num_views times
+            - ring: num_views sensors "rgb_ring_{i}" at fixed yaw offsets,
+              the whole ring is rendered by one observation call
+            - equirect: a single equirectangular "rgb" sensor (height x 2 * height)
+            
+    Returns:
+        Habitat simulator configuration object
+    """
+    assert mode in CAPTURE_360_MODES, f"Unknown 360 capture mode {mode}"
+    sim_config = habitat_sim.SimulatorConfiguration()
+    sim_config.scene_id = settings["scene"]
+    
+    def rgb_sensor(uuid, yaw=0.0):
+        sensor = habitat_sim.CameraSensorSpec()
+        sensor.uuid = uuid
+        sensor.sensor_type = habitat_sim.SensorType.COLOR
+        sensor.resolution = [settings["height"], settings["width"]]
+        sensor.position = [0.0, settings["sensor_height"], 0.0]
+        sensor.orientation = [0.0, yaw, 0.0]
+        sensor.hfov = settings["hfov"]
+        return sensor
+    
+    if mode == "ring":
+        # Same yaw offsets as the rotations of the rotate mode
+        sensors = [rgb_sensor(f"rgb_ring_{i}", np.deg2rad(360.0 / num_views * i)) for i in range(num_views)]
+    else:
+        sensors = [rgb_sensor("rgb")]
+        if mode == "equirect":
+            sensors[0].sensor_subtype = habitat_sim.SensorSubType.EQUIRECTANGULAR
+            sensors[0].resolution = [settings["height"], 2 * settings["height"]]
+    
+    agent_config = habitat_sim.agent.AgentConfiguration()
+    agent_config.sensor_specifications = sensors
+    return habitat_sim.Configuration(sim_config, [agent_config])
+
+def get_360_composite_image(sim, sim_settings, agent_state, agent, base_rotation, num_views=20, mode="rotate"):
     """
     Captures multiple images at fixed angular increments around the agent using quaternion rotations 
     and stitches them together.
     
+    With mode "ring" or "equirect" the simulator must be configured with
+    make_360_cfg for the same mode: the whole capture is then a single
+    observation call, an equirectangular panorama is returned as is.
+    
     Args:
         sim: The habitat simulator instance.
         sim_settings: Simulation settings dictionary.
@@ -170,10 +507,20 @@ def get_360_composite_image(sim, sim_settings, agent_state, agent, base_rotation
         agent: The agent instance.
         base_rotation (quaternion.quaternion): The starting rotation as a quaternion.
         num_views (int): Number of images to capture around the 360° circle.
+        mode (str): One of CAPTURE_360_MODES.
     
     Returns:
         np.array: The composite 360° image.
     """
+    if mode in ("ring", "equirect"):
+        # Quaternion object, an ndarray rotation is read as [x, y, z, w] by set_state
+        agent_state.rotation = base_rotation
+        agent.set_state(agent_state)
+        obs = sim.get_sensor_observations()
+        if mode == "equirect":
+            return obs['rgb']
+        return np.hstack([obs[f"rgb_ring_{i}"] for i in range(num_views)])
+    
     images = []
     angle_increment = 360.0 / num_views
 
@@ -186,15 +533,15 @@ def get_360_composite_image(sim, sim_settings, agent_state, agent, base_rotation
         
         # Create a quaternion representing the yaw rotation about the Y-axis.
         # Quaternion format: cos(theta/2) + sin(theta/2)*(0*i + 1*j + 0*k)
-        yaw_quat = quaternion.quaternion(np.cos(yaw_angle_rad / 2), 0, 0, np.sin(yaw_angle_rad / 2))
+        yaw_quat = quaternion.quaternion(np.cos(yaw_angle_rad / 2), 0, np.sin(yaw_angle_rad / 2), 0)
         
         # Calculate the new rotation.
         # The order of multiplication matters. Here, we apply the yaw rotation relative to base.
         new_rotation = base_rotation * yaw_quat
         
         # Update the agent's rotation in agent_state.
-        # Convert the quaternion to an array in the order [w, x, y, z].
-        agent_state.rotation = np.array([new_rotation.w, new_rotation.x, new_rotation.y, new_rotation.z])
+        # Kept as a quaternion object, set_state reads an ndarray rotation as [x, y, z, w].
+        agent_state.rotation = new_rotation
         agent.set_state(agent_state)
         
         # Capture the image from the simulator.
@@ -203,7 +550,7 @@ def get_360_composite_image(sim, sim_settings, agent_state, agent, base_rotation
         images.append(image)
     
     # Restore the original rotation.
-    agent_state.rotation = np.array([original_rotation.w, original_rotation.x, original_rotation.y, original_rotation.z])
+    agent_state.rotation = original_rotation
     agent.set_state(agent_state)
     
     # Stitch the images:
@@ -220,5 +567,46 @@ def get_360_composite_image(sim, sim_settings, agent_state, agent, base_rotation
     return composite_image
 
 
+def benchmark_360_capture(scene_path: str, num_views: int = 20, repeats: int = 10) -> None:
+    """
+    Time get_360_composite_image with each capture mode on a scene, from the
+    same agent pose, and print how far the ring views are from the rotate
+    views of the same headings.
+    """
+    settings = {"scene": scene_path, "default_agent": 0, "sensor_height": 1.0, "width": 256, "height": 256, "hfov": 90}
+    position = None
+    images = {}
+    for mode in CAPTURE_360_MODES:
+        sim = habitat_sim.Simulator(make_360_cfg(settings, num_views, mode))
+        agent = sim.initialize_agent(0)
+        if position is None:
+            position = sim.pathfinder.get_random_navigable_point()
+        agent_state = habitat_sim.AgentState()
+        agent_state.position = position
+        base_rotation = quaternion.quaternion(1, 0, 0, 0)
+        
+        # Warm-up capture, not timed
+        images[mode] = get_360_composite_image(sim, settings, agent_state, agent, base_rotation, num_views, mode)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            get_360_composite_image(sim, settings, agent_state, agent, base_rotation, num_views, mode)
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"{mode:>9}: {1000 * elapsed:7.1f} ms per capture | image {images[mode].shape}")
+        sim.close()
+    
+    # Both composites are the num_views views side by side, heading i in column block i
+    rotate_views = np.split(images["rotate"].astype(np.int16), num_views, axis=1)
+    ring_views = np.split(images["ring"].astype(np.int16), num_views, axis=1)
+    diffs = [np.abs(a - b) for a, b in zip(rotate_views, ring_views)]
+    worst = int(np.argmax([d.mean() for d in diffs]))
+    print(f"ring vs rotate: max abs diff {max(int(d.max()) for d in diffs)}, "
+          f"worst heading {360.0 / num_views * worst:.0f}° (mean abs diff {diffs[worst].mean():.2f})")
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the 360° capture modes")
+    parser.add_argument("--scene", type=str, required=True, help="Path of a .basis.glb scene")
+    parser.add_argument("--num_views", type=int, default=20, help="Views around the 360° circle")
+    parser.add_argument("--repeats", type=int, default=10, help="Timed captures per mode")
+    args = parser.parse_args()
+    benchmark_360_capture(args.scene, args.num_views, args.repeats)